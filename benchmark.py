@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import cProfile
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import pstats
+import random
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Katalogi trzech modułów repozytorium
+KATALOG = os.path.dirname(os.path.abspath(__file__))
+KATALOG_HAMMING = os.path.join(KATALOG, "zadanie chuj wie w sumie ale chyba 1")
+KATALOG_HUFFMAN = os.path.join(KATALOG, "zadanie3")
+KATALOG_AUDIO = os.path.join(KATALOG, "zadanie4")
+# Rozmiary wejścia (znaki tekstu albo próbki audio) sprawdzane przez każdy przypadek
+DOMYSLNE_ROZMIARY = (1 << 14, 1 << 17, 1 << 20)
+DOMYSLNE_POWTORZENIA = 5  # Liczba mierzonych wywołań na przypadek i rozmiar (po jednym rozgrzewkowym)
+LICZBA_HOTSPOTOW = 15  # Liczba funkcji/miejsc zapisywanych w trybie profilowania
+# Alfabet tekstu testowego z wagami zbliżonymi do tekstu naturalnego
+ALFABET = " etaoinshrdlucmfwypvbgkjqxz.,\n"
+WAGI_ALFABETU = [18, 12, 9, 8, 7, 7, 6, 6, 6, 6, 4, 4, 3, 3, 2, 2, 2, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+
+
+def _wczytaj_modul(nazwa, katalog, plik="main.py"):
+    """
+    Importuje moduł z pliku (katalog Hamminga ma spacje w nazwie, a dwa moduły nazywają się main.py).
+    Katalog trafia też do sys.path, żeby działały importy wewnątrz modułu.
+    """
+    if katalog not in sys.path:
+        sys.path.insert(0, katalog)
+    spec = importlib.util.spec_from_file_location(nazwa, os.path.join(katalog, plik))
+    modul = importlib.util.module_from_spec(spec)
+    sys.modules[nazwa] = modul
+    spec.loader.exec_module(modul)
+    return modul
+
+
+def tekst_testowy(rozmiar, ziarno=0):
+    return "".join(random.Random(ziarno).choices(ALFABET, weights=WAGI_ALFABETU, k=rozmiar))
+
+
+def _plik_tymczasowy(tekst):
+    fd, sciezka = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(tekst)
+    return sciezka
+
+
+# Każdy przypadek przygotowuje dane poza pomiarem i zwraca (mierzona funkcja, rozmiar wejścia w bajtach, sprzątanie)
+
+def _hamming_kodowanie(rozmiar):
+    hamming = _wczytaj_modul("hamming", KATALOG_HAMMING)
+    wiadomosc = tekst_testowy(rozmiar)
+    return lambda: hamming.encode_message(wiadomosc), rozmiar, None
+
+
+def _hamming_naprawa(rozmiar):
+    hamming = _wczytaj_modul("hamming", KATALOG_HAMMING)
+    uszkodzona = hamming.introduce_errors(hamming.encode_message(tekst_testowy(rozmiar)),
+                                          max(1, rozmiar // 1000), verbose=False)
+    return lambda: hamming.fix_errors(uszkodzona), rozmiar, None
+
+
+def _hamming_dekodowanie(rozmiar):
+    hamming = _wczytaj_modul("hamming", KATALOG_HAMMING)
+    naprawiona = hamming.fix_errors(hamming.encode_message(tekst_testowy(rozmiar)))
+    return lambda: hamming.decode_message(naprawiona), rozmiar, None
+
+
+def _huffman_czestotliwosci(rozmiar):
+    codec = _wczytaj_modul("huffman_codec", KATALOG_HUFFMAN, "huffman_codec.py")
+    sciezka = _plik_tymczasowy(tekst_testowy(rozmiar))
+    return lambda: codec.calculate_frequencies(sciezka), rozmiar, lambda: os.remove(sciezka)
+
+
+def _huffman_kody(rozmiar):
+    codec = _wczytaj_modul("huffman_codec", KATALOG_HUFFMAN, "huffman_codec.py")
+    czestotliwosci = codec.calculate_text_frequencies(tekst_testowy(rozmiar))
+    return lambda: codec.serialize_code_lengths(codec.build_canonical_codes(czestotliwosci)), rozmiar, None
+
+
+def _huffman_kodowanie(rozmiar):
+    codec = _wczytaj_modul("huffman_codec", KATALOG_HUFFMAN, "huffman_codec.py")
+    tekst = tekst_testowy(rozmiar)
+    kody = codec.build_canonical_codes(codec.calculate_text_frequencies(tekst))
+    return lambda: codec.encode_text(tekst, kody), rozmiar, None
+
+
+def _huffman_tablica(rozmiar):
+    """
+    Budowa tablicy dekodującej z nagłówka słownika (serwer robi to raz na słownik w procesie roboczym).
+    """
+    codec = _wczytaj_modul("huffman_codec", KATALOG_HUFFMAN, "huffman_codec.py")
+    naglowek = codec.serialize_code_lengths(codec.build_canonical_codes(
+        codec.calculate_text_frequencies(tekst_testowy(rozmiar))))
+    return lambda: codec.decode_table_from_header(naglowek), rozmiar, None
+
+
+def _huffman_dekodowanie(rozmiar):
+    codec = _wczytaj_modul("huffman_codec", KATALOG_HUFFMAN, "huffman_codec.py")
+    tekst = tekst_testowy(rozmiar)
+    kody = codec.build_canonical_codes(codec.calculate_text_frequencies(tekst))
+    bajty, padding = codec.encode_text(tekst, kody)
+    tablica = codec.decode_table_from_header(codec.serialize_code_lengths(kody))
+    return lambda: tablica.decode(bajty, padding), rozmiar, None
+
+
+def _huffman_petla_zwrotna(rozmiar):
+    """
+    Pełny transfer przez gniazdo: klient send_file -> serwer HuffmanDecoderServer (w tym samym procesie,
+    pętla zdarzeń w osobnym wątku, dekodowanie w puli jednego procesu, wynik w pamięci).
+    """
+    _wczytaj_modul("huffman_codec", KATALOG_HUFFMAN, "huffman_codec.py")
+    serwer_modul = _wczytaj_modul("huffman_decoder_server", KATALOG_HUFFMAN, "huffman_decoder_server.py")
+    klient = _wczytaj_modul("huffman_encoder_client", KATALOG_HUFFMAN, "huffman_encoder_client.py")
+    sciezka = _plik_tymczasowy(tekst_testowy(rozmiar))
+    petla = asyncio.new_event_loop()
+    watek = threading.Thread(target=petla.run_forever)
+    watek.start()
+    serwer = serwer_modul.HuffmanDecoderServer('127.0.0.1', 0, workers=1, output_dir=None, verbose=False)
+    asyncio.run_coroutine_threadsafe(serwer.start(), petla).result()
+
+    def transfer():
+        oczekiwane = serwer.stats["completed"] + serwer.stats["errors"] + 1
+        with socket.create_connection(('127.0.0.1', serwer.port)) as s:
+            klient.send_file(s, sciezka)
+        asyncio.run_coroutine_threadsafe(serwer.wait_for_completed(oczekiwane), petla).result()
+        serwer.results.clear()
+
+    def zamknij():
+        asyncio.run_coroutine_threadsafe(serwer.close(), petla).result()
+        petla.call_soon_threadsafe(petla.stop)
+        watek.join()
+        petla.close()
+        os.remove(sciezka)
+
+    return transfer, rozmiar, zamknij
+
+
+def _audio_kwantyzacja(rozmiar):
+    audio = _wczytaj_modul("audio", KATALOG_AUDIO)
+    blok = np.random.default_rng(0).uniform(-1.0, 1.0, (rozmiar, 1)).astype(np.float32)
+    kwantyzator = audio.Kwantyzator(16, rozmiar, 1)
+    return lambda: kwantyzator.kwantyzuj(blok), blok.nbytes, None
+
+
+def _audio_normalizacja(rozmiar):
+    audio = _wczytaj_modul("audio", KATALOG_AUDIO)
+    blok = np.random.default_rng(0).integers(-2 ** 15, 2 ** 15, (rozmiar, 1), dtype=np.int16)
+    bufor_float = np.empty((rozmiar, 1), dtype=np.float32)
+    return lambda: audio.normalizuj_blok(blok, bufor_float), blok.nbytes, None
+
+
+PRZYPADKI = {
+    "hamming.kodowanie": _hamming_kodowanie,
+    "hamming.naprawa": _hamming_naprawa,
+    "hamming.dekodowanie": _hamming_dekodowanie,
+    "huffman.czestotliwosci": _huffman_czestotliwosci,
+    "huffman.kody": _huffman_kody,
+    "huffman.kodowanie": _huffman_kodowanie,
+    "huffman.tablica": _huffman_tablica,
+    "huffman.dekodowanie": _huffman_dekodowanie,
+    "huffman.petla_zwrotna": _huffman_petla_zwrotna,
+    "audio.kwantyzacja": _audio_kwantyzacja,
+    "audio.normalizacja": _audio_normalizacja,
+}
+
+
+def _hotspoty_cprofile(funkcja, liczba):
+    profiler = cProfile.Profile()
+    profiler.runcall(funkcja)
+    statystyki = pstats.Stats(profiler).stats
+    najwieksze = sorted(statystyki.items(), key=lambda wpis: wpis[1][3], reverse=True)[:liczba]
+    return [{"funkcja": f"{plik}:{linia}({nazwa})", "wywolania": wywolania, "czas_wlasny_s": czas_wlasny,
+             "czas_laczny_s": czas_laczny}
+            for (plik, linia, nazwa), (_, wywolania, czas_wlasny, czas_laczny, _) in najwieksze]
+
+
+def _hotspoty_tracemalloc(funkcja, liczba):
+    tracemalloc.start()
+    funkcja()
+    migawka = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return [{"miejsce": str(statystyka.traceback), "rozmiar_kb": statystyka.size / 1024, "bloki": statystyka.count}
+            for statystyka in migawka.statistics('lineno')[:liczba]]
+
+
+def uruchom_przypadek(nazwa, rozmiar, powtorzenia=DOMYSLNE_POWTORZENIA, profil=None, liczba_hotspotow=LICZBA_HOTSPOTOW):
+    """
+    Mierzy jeden przypadek dla jednego rozmiaru: wywołanie rozgrzewkowe, potem powtorzenia pomiarów.
+    Uruchamiana w osobnym procesie, więc szczytowe RSS (ru_maxrss) dotyczy tylko tego przypadku.
+    profil - None, "cprofile" albo "tracemalloc" (dodatkowe wywołanie pod profilerem).
+    """
+    funkcja, bajty, zamknij = PRZYPADKI[nazwa](rozmiar)
+    try:
+        funkcja()
+        czasy = []
+        for _ in range(powtorzenia):
+            start = time.perf_counter()
+            funkcja()
+            czasy.append(time.perf_counter() - start)
+        hotspoty = None
+        if profil == "cprofile":
+            hotspoty = _hotspoty_cprofile(funkcja, liczba_hotspotow)
+        elif profil == "tracemalloc":
+            hotspoty = _hotspoty_tracemalloc(funkcja, liczba_hotspotow)
+    finally:
+        if zamknij is not None:
+            zamknij()
+    mediana = float(np.median(czasy))
+    p50, p90, p99 = np.percentile(czasy, [50, 90, 99]) * 1000
+    return {"przypadek": nazwa, "rozmiar": rozmiar, "bajty": bajty, "powtorzenia": powtorzenia,
+            "przepustowosc_mb_s": bajty / mediana / (1024 * 1024), "elementy_na_s": rozmiar / mediana,
+            "opoznienie_ms": {"min": min(czasy) * 1000, "p50": p50, "p90": p90, "p99": p99, "max": max(czasy) * 1000},
+            # ru_maxrss na Linuksie w KB
+            "szczytowe_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "hotspoty": hotspoty}
+
+
+def uruchom_benchmark(przypadki=None, rozmiary=DOMYSLNE_ROZMIARY, powtorzenia=DOMYSLNE_POWTORZENIA, profil=None,
+                      plik_wynikow=None):
+    """
+    Uruchamia wybrane przypadki (domyślnie wszystkie; można podać prefiks grupy, np. "huffman")
+    dla każdego rozmiaru w świeżym procesie, wypisuje tabelę i opcjonalnie zapisuje JSON.
+    """
+    wybrane = [nazwa for nazwa in PRZYPADKI
+               if not przypadki or any(nazwa == p or nazwa.startswith(p + ".") for p in przypadki)]
+    wyniki = []
+    print(f"{'przypadek':>24} {'rozmiar':>9} {'MB/s':>9} {'p50 [ms]':>10} {'p90 [ms]':>10} {'p99 [ms]':>10} "
+          f"{'RSS [MB]':>9}")
+    # Proces na każdy pomiar (spawn - bez odziedziczonej pamięci rodzica)
+    kontekst = multiprocessing.get_context('spawn')
+    for nazwa in wybrane:
+        for rozmiar in rozmiary:
+            with ProcessPoolExecutor(max_workers=1, mp_context=kontekst) as pool:
+                wynik = pool.submit(uruchom_przypadek, nazwa, rozmiar, powtorzenia, profil).result()
+            opoznienie = wynik["opoznienie_ms"]
+            print(f"{nazwa:>24} {rozmiar:>9} {wynik['przepustowosc_mb_s']:>9.2f} {opoznienie['p50']:>10.3f} "
+                  f"{opoznienie['p90']:>10.3f} {opoznienie['p99']:>10.3f} {wynik['szczytowe_rss_mb']:>9.1f}")
+            if wynik["hotspoty"]:
+                for hotspot in wynik["hotspoty"][:5]:
+                    print("    " + (f"{hotspot['czas_laczny_s']:.4f} s  {hotspot['funkcja']}" if "funkcja" in hotspot
+                                    else f"{hotspot['rozmiar_kb']:.1f} KB  {hotspot['miejsce']}"))
+            wyniki.append(wynik)
+    raport = {"srodowisko": {"python": platform.python_version(), "numpy": np.__version__,
+                             "system": platform.platform(), "procesory": os.cpu_count(),
+                             "czas": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "wyniki": wyniki}
+    if plik_wynikow is not None:
+        with open(plik_wynikow, 'w', encoding='utf-8') as f:
+            json.dump(raport, f, indent=2)
+        print(f"Zapisano wyniki do {plik_wynikow}.")
+    return raport
+
+
+def porownaj(plik_bazowy, raport, prog=0.1):
+    """
+    Porównuje przepustowość z zapisanym wcześniej raportem; spadki większe niż prog oznacza jako regresje.
+    Zwraca listę (przypadek, rozmiar, stosunek nowej przepustowości do bazowej) dla regresji.
+    """
+    with open(plik_bazowy, encoding='utf-8') as f:
+        bazowe = {(w["przypadek"], w["rozmiar"]): w for w in json.load(f)["wyniki"]}
+    regresje = []
+    print(f"{'przypadek':>24} {'rozmiar':>9} {'bazowo MB/s':>12} {'teraz MB/s':>11} {'zmiana':>8}")
+    for wynik in raport["wyniki"]:
+        bazowy = bazowe.get((wynik["przypadek"], wynik["rozmiar"]))
+        if bazowy is None:
+            continue
+        stosunek = wynik["przepustowosc_mb_s"] / bazowy["przepustowosc_mb_s"]
+        oznaczenie = "  REGRESJA" if stosunek < 1 - prog else ""
+        print(f"{wynik['przypadek']:>24} {wynik['rozmiar']:>9} {bazowy['przepustowosc_mb_s']:>12.2f} "
+              f"{wynik['przepustowosc_mb_s']:>11.2f} {stosunek - 1:>+8.1%}{oznaczenie}")
+        if oznaczenie:
+            regresje.append((wynik["przypadek"], wynik["rozmiar"], stosunek))
+    return regresje
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ścieżek Hamminga, Huffmana i audio bez interakcji.")
+    parser.add_argument("przypadki", nargs="*", help=f"przypadki lub grupy (domyślnie wszystkie): {', '.join(PRZYPADKI)}")
+    parser.add_argument("--rozmiary", type=int, nargs="+", default=list(DOMYSLNE_ROZMIARY))
+    parser.add_argument("--powtorzenia", type=int, default=DOMYSLNE_POWTORZENIA)
+    parser.add_argument("--profil", choices=["cprofile", "tracemalloc"], help="zapisuje hotspoty funkcji/alokacji")
+    parser.add_argument("--wyniki", help="plik JSON na wyniki")
+    parser.add_argument("--porownaj", help="plik JSON z wcześniejszymi wynikami do porównania")
+    parser.add_argument("--prog", type=float, default=0.1, help="względny spadek przepustowości uznawany za regresję")
+    args = parser.parse_args(argv)
+    raport = uruchom_benchmark(args.przypadki, args.rozmiary, args.powtorzenia, args.profil, args.wyniki)
+    if args.porownaj:
+        return 1 if porownaj(args.porownaj, raport, args.prog) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,23 @@
 import numpy as np
+import os
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from multiprocessing.shared_memory import SharedMemory
 
 # stałe pliki wejściowe i wyjściowe
 INPUT_FILE = "input.txt"
 OUTPUT_FILE = "output.txt"
+# plik ze słowami kodowymi (uint16, big-endian - 2 bajty na słowo)
+ENCODED_FILE = "encoded.bin"
+CODEWORD_DTYPE = ">u2"
+# rozmiar porcji danych czytanych z pliku w trybie strumieniowym
+CHUNK_SIZE = 1024 * 1024
+# liczba słów losowanych naraz w symulacji kanału (ogranicza zużycie pamięci)
+SIM_CHUNK_WORDS = 1 << 18
+# liczba słów w jednym zadaniu symulacji wysyłanym do procesu roboczego
+SIM_SHARD_WORDS = 1 << 20
 
 # przygotowujemy wbudowaną wiadomość do testowania, tablica 8-bitowa 'A'
 MESSAGE = np.array([0, 1, 0, 0, 0, 0, 0, 1])
@@ -20,19 +34,56 @@ H_MATRIX = np.array([
     [1, 1, 1, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1]
 ])
 
-def encode_message(message):
+# tablica słów kodowych dla wszystkich 256 możliwych bajtów - liczona jednym mnożeniem macierzy nad GF(2)
+_ALL_BYTES = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1)
+CODEWORD_TABLE = np.concatenate(
+    (_ALL_BYTES, np.dot(_ALL_BYTES, H_MATRIX[:, :8].T.astype(np.uint8)) % 2), axis=1
+).astype(np.uint8)
+# te same słowa kodowe spakowane do 2 bajtów (bajt danych, bajt parzystości)
+CODEWORD_BYTES_TABLE = np.packbits(CODEWORD_TABLE, axis=1)
+# liczba jedynek w każdym bajcie
+POPCOUNT_TABLE = _ALL_BYTES.sum(axis=1).astype(np.uint8)
+# bajt parzystości dla każdego bajtu danych - tryb zwarty (słowo = uint16, syndrom = uint8)
+PARITY_TABLE = CODEWORD_BYTES_TABLE[:, 1].copy()
+
+def encode_bytes(data, packed=False):
+    """koduje cały bufor bajtów naraz: zwraca tablicę (N, 16) słów kodowych lub spakowane bajty"""
+    data_bytes = np.frombuffer(data, dtype=np.uint8)
+    # każdy bajt wybiera gotowe słowo kodowe z tablicy - bez pętli po znakach
+    if packed:
+        return CODEWORD_BYTES_TABLE[data_bytes].tobytes()
+    return CODEWORD_TABLE[data_bytes]
+
+def encode_words(data):
+    """koduje bufor bajtów w trybie zwartym: jedno słowo kodowe = jeden uint16 (dane << 8 | parzystość)"""
+    data_bytes = np.frombuffer(data, dtype=np.uint8)
+    return (data_bytes.astype(np.uint16) << 8) | PARITY_TABLE[data_bytes]
+
+def bits_to_words(encoded_message):
+    """zamienia tablicę (N, 16) bitów na słowa uint16"""
+    return np.packbits(np.asarray(encoded_message, dtype=np.uint8), axis=1).view(">u2")[:, 0].astype(np.uint16)
+
+def encode_message(message, compact=False):
     """zamienia wiadomość tekstową na ciąg bitowy: dodaje bity parzystości"""
-    encoded_list = []
-    for char in message:
-        # każdy znak zamieniany jest na jego 8-bitową postać binarną
-        data_bits = np.array([int(bit) for bit in f"{ord(char):08b}"], dtype=int)
-        # bity parzystości generowane w oparciu o macierz kontrolną
-        parity_bits = (np.dot(H_MATRIX[:, :8], data_bits) % 2).astype(int)
-        # łączymy bity danych z wygenerowanymi bitami parzystości
-        encoded_char = np.concatenate((data_bits, parity_bits))
-        # zapisujemy zakodowany znak do listy
-        encoded_list.append(encoded_char)
-    return np.array(encoded_list)
+    # każdy znak zamieniany jest na jego 8-bitową postać binarną (kodowanie wsadowe)
+    if compact:
+        return encode_words(message.encode("latin-1"))
+    return encode_bytes(message.encode("latin-1")).astype(int)
+
+def benchmark_encode(size_mb=8, repeats=3):
+    """mierzy przepustowość kodowania wsadowego w MB/s"""
+    data = np.random.randint(0, 256, size_mb * 1024 * 1024, dtype=np.uint8).tobytes()
+    results = {}
+    for packed in (False, True):
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            encode_bytes(data, packed=packed)
+            best = min(best, time.perf_counter() - start)
+        results[packed] = size_mb / best
+        label = "bajty" if packed else "tablica (N, 16)"
+        print(f"\nkodowanie {size_mb} MB -> {label}: {best:.3f} s, {results[packed]:.1f} MB/s")
+    return results
 
 def encode_bits(bit_array):
     """koduje tablicę bitów - rozszerzając ją o bity parzystości"""
@@ -41,83 +92,105 @@ def encode_bits(bit_array):
     encoded_bits = np.concatenate((bit_array, parity_bits))
     return np.array([encoded_bits])
 
-def introduce_errors(encoded_message, num_errors=1):
+def introduce_errors(encoded_message, num_errors=1, verbose=True):
     """dodaje błędy (wskazaną liczbę) do zakodowanej wiadomości"""
-    modified_positions = []  # przechowuje pozycje, gdzie są już zmodyfikowane bity
+    modified_positions = set()  # przechowuje pozycje, gdzie są już zmodyfikowane bity
     result = encoded_message.copy()  # kopia oryginalnej wiadomości
+    compact = result.ndim == 1  # tryb zwarty - słowa uint16
 
     for i in range(num_errors):
         while True:
             # losujemy znak i jego bit, który zamierzamy uszkodzić
             word_index = random.randint(0, len(result) - 1)
-            bit_index = random.randint(0, len(result[word_index]) - 1)
+            bit_index = random.randint(0, (16 if compact else len(result[word_index])) - 1)
 
             if (word_index, bit_index) not in modified_positions:
                 # upewniamy się, że ten bit nie jest już uszkodzony
-                modified_positions.append((word_index, bit_index))
+                modified_positions.add((word_index, bit_index))
                 break
 
         # uszkadzamy wybrany bit poprzez odwrócenie jego wartości
-        result[word_index][bit_index] = 1 - result[word_index][bit_index]
-        print(f"\nwprowadzono błąd na pozycji: znak {word_index}, bit {bit_index}")
+        if compact:
+            result[word_index] ^= np.uint16(1 << (15 - bit_index))  # bit 0 to najstarszy bit słowa
+        else:
+            result[word_index][bit_index] = 1 - result[word_index][bit_index]
+        if verbose:
+            print(f"\nwprowadzono błąd na pozycji: znak {word_index}, bit {bit_index}")
 
     return result
 
+# statusy słów zwracane przez dekoder tablicowy
+STATUS_CLEAN = 0  # brak błędów
+STATUS_CORRECTED_1 = 1  # naprawiono pojedynczy błąd
+STATUS_CORRECTED_2 = 2  # naprawiono dwa błędy
+STATUS_UNCORRECTABLE = 3  # nie udało się naprawić
+
+# wagi bitów syndromu - 8-bitowy syndrom zamieniamy na indeks 0..255
+_SYNDROME_WEIGHTS = 1 << np.arange(7, -1, -1)
+
+def _build_syndrome_tables():
+    """buduje tablice: syndrom -> maska błędu (16 bitów) oraz syndrom -> status"""
+    masks = np.zeros((256, H_MATRIX.shape[1]), dtype=np.uint8)
+    statuses = np.full(256, STATUS_UNCORRECTABLE, dtype=np.uint8)
+    statuses[0] = STATUS_CLEAN
+    columns = H_MATRIX.T.dot(_SYNDROME_WEIGHTS)  # syndrom każdej kolumny jako liczba
+
+    # pojedyncze błędy - syndrom równy kolumnie macierzy H
+    for i, syndrome in enumerate(columns):
+        if statuses[syndrome] == STATUS_UNCORRECTABLE:
+            masks[syndrome, i] = 1
+            statuses[syndrome] = STATUS_CORRECTED_1
+
+    # podwójne błędy - syndrom równy sumie (xor) dwóch kolumn, pierwsza pasująca para wygrywa
+    for i in range(len(columns)):
+        for j in range(i + 1, len(columns)):
+            syndrome = columns[i] ^ columns[j]
+            if statuses[syndrome] == STATUS_UNCORRECTABLE:
+                masks[syndrome, [i, j]] = 1
+                statuses[syndrome] = STATUS_CORRECTED_2
+
+    return masks, statuses
+
+ERROR_MASK_TABLE, SYNDROME_STATUS_TABLE = _build_syndrome_tables()
+# te same maski błędów jako uint16 - naprawa słowa w trybie zwartym to jeden xor
+ERROR_WORD_TABLE = bits_to_words(ERROR_MASK_TABLE)
+
+def compute_syndromes(encoded_message):
+    """oblicza syndromy wszystkich słów ((N, 16) bitów lub uint16) naraz jako liczby 0..255"""
+    if encoded_message.ndim == 1:
+        # część parzystości macierzy H to macierz jednostkowa, więc syndrom to
+        # xor oczekiwanego bajtu parzystości z odebranym
+        return PARITY_TABLE[encoded_message >> 8] ^ (encoded_message & 0xFF).astype(np.uint8)
+    syndrome_bits = np.dot(encoded_message, H_MATRIX.T) % 2
+    return syndrome_bits.dot(_SYNDROME_WEIGHTS)
+
+def correct_codewords(encoded_message):
+    """naprawia wszystkie słowa naraz - zwraca poprawione słowa i status każdego słowa"""
+    syndromes = compute_syndromes(encoded_message)
+    if encoded_message.ndim == 1:
+        return encoded_message ^ ERROR_WORD_TABLE[syndromes], SYNDROME_STATUS_TABLE[syndromes]
+    corrected = encoded_message ^ ERROR_MASK_TABLE[syndromes].astype(encoded_message.dtype)
+    return corrected, SYNDROME_STATUS_TABLE[syndromes]
+
 def count_errors(code_word):
     """sprawdza liczbę błędów w podanym słowie kodowym"""
-    syndrome = np.mod(np.dot(H_MATRIX, code_word), 2)  # oblicza syndrom błędu
-
-    if np.all(syndrome == 0):  # jeśli syndrom to same zera, to brak błędów
-        return 0
-
-    for i in range(H_MATRIX.shape[1]):
-        # sprawdzamy, czy syndrom pasuje do którejś kolumny macierzy H
-        if np.array_equal(syndrome, H_MATRIX[:, i]):
-            return 1  # jeśli tak, mamy dokładnie 1 błąd
-
-    return 2  # jeśli nie, to więcej niż jeden błąd
+    syndrome = compute_syndromes(np.asarray(code_word)[np.newaxis])[0]  # oblicza syndrom błędu
+    # 0 - brak błędów, 1 - dokładnie 1 błąd, 2 - więcej niż jeden błąd
+    return min(int(SYNDROME_STATUS_TABLE[syndrome]), 2)
 
 def fix_errors(encoded_message):
     """naprawa błędów w zakodowanej wiadomości"""
-    fixed_message = []
-
-    for word in encoded_message:  # dla każdego zakodowanego słowa
-        syndrome = np.mod(np.dot(H_MATRIX, word), 2)  # obliczamy syndrom błędu
-        error_count = count_errors(word)
-        corrected_word = word.copy()  # kopia do naprawiania
-
-        if error_count == 0:  # brak błędów
-            fixed_message.append(corrected_word[:8])
-
-        elif error_count == 1:  # naprawiamy pojedynczy błąd
-            for i in range(len(corrected_word)):
-                if np.array_equal(syndrome, H_MATRIX[:, i]):
-                    corrected_word[i] = 1 - corrected_word[i]  # odwracamy bit
-                    fixed_message.append(corrected_word[:8]) # zapisujemy poprawione dane
-                    break
-
-        else:
-            # dla dwóch błędów musimy zastosować zaawansowaną naprawę
-            found = False
-            for i in range(len(corrected_word)):
-                if found:
-                    break
-                for j in range(i + 1, len(corrected_word)):
-                    sum_cols = (H_MATRIX[:, i] + H_MATRIX[:, j]) % 2 # suma kolumn modulo 2
-                    if np.array_equal(syndrome, sum_cols):  # znaleźliśmy pasującą parę
-                        corrected_word[i], corrected_word[j] = 1 - corrected_word[i], 1 - corrected_word[j] # poprawiamy oba błedy błąd
-                        fixed_message.append(corrected_word[:8]) # zapisujemy poprawione dane
-                        found = True
-                        break
-
-            if not found:
-                fixed_message.append(word[:8])  # błędy zostają niezmienione / nie udało sie naprawić
-
-    return np.array(fixed_message)
+    # słowa, których nie udało się naprawić, zostają niezmienione
+    corrected, _ = correct_codewords(np.asarray(encoded_message))
+    if corrected.ndim == 1:
+        return (corrected >> 8).astype(np.uint8)  # tryb zwarty - od razu bajty danych
+    return corrected[:, :8]
 
 def decode_message(encoded_data):
     """konwersja naprawionej wiadomości binarnej na tekst"""
-    return ''.join(chr(int(''.join(map(str, word)), 2)) for word in encoded_data)
+    if encoded_data.ndim == 1:
+        return encoded_data.astype(np.uint8).tobytes().decode("latin-1")  # tryb zwarty - bajty danych
+    return np.packbits(encoded_data.astype(np.uint8), axis=1).tobytes().decode("latin-1")
 
 def process_bits(bit_array, error_count):
     """procedura obsługi tablicy bitów: koduje, uszkadza, naprawia"""
@@ -175,11 +248,281 @@ def process_file():
     except Exception as e:
         print(f"Wystąpił błąd: {e}")
 
+def process_file_stream(input_path=INPUT_FILE, output_path=OUTPUT_FILE, errors_per_chunk=2,
+                        chunk_size=CHUNK_SIZE, quiet=True):
+    """strumieniowe procesowanie dowolnego pliku porcjami: kodowanie -> błędy -> naprawa -> zapis"""
+    counters = {"words": 0, "clean": 0, "corrected": 0, "uncorrectable": 0}
+    start = time.perf_counter()
+
+    try:
+        with open(input_path, "rb") as src, open(output_path, "wb") as dst:
+            chunk_index = 0
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+
+                words = encode_words(chunk)  # kodowanie w trybie zwartym
+                # nie da się uszkodzić więcej różnych bitów, niż jest w porcji
+                num_errors = min(errors_per_chunk, len(words) * 16)
+                damaged = introduce_errors(words, num_errors, verbose=False)
+                corrected, status = correct_codewords(damaged)
+                dst.write((corrected >> 8).astype(np.uint8).tobytes())  # bajty danych
+
+                counts = np.bincount(status, minlength=4)
+                counters["words"] += len(words)
+                counters["clean"] += int(counts[STATUS_CLEAN])
+                counters["corrected"] += int(counts[STATUS_CORRECTED_1] + counts[STATUS_CORRECTED_2])
+                counters["uncorrectable"] += int(counts[STATUS_UNCORRECTABLE])
+
+                if not quiet:
+                    print(f"porcja {chunk_index}: słów {len(words)}, naprawionych "
+                          f"{counts[STATUS_CORRECTED_1] + counts[STATUS_CORRECTED_2]}, "
+                          f"nienaprawialnych {counts[STATUS_UNCORRECTABLE]}")
+                chunk_index += 1
+
+    except Exception as e:
+        print(f"Wystąpił błąd: {e}")
+        return counters
+
+    elapsed = time.perf_counter() - start
+    counters["mb_per_s"] = counters["words"] / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+    print(f"\nprzetworzono słów: {counters['words']}, naprawiono: {counters['corrected']}, "
+          f"nienaprawialnych: {counters['uncorrectable']}, {counters['mb_per_s']:.1f} MB/s")
+    return counters
+
+def binary_symmetric_channel(words, error_probability, rng):
+    """kanał BSC: każdy bit słów uint16 odwracany niezależnie z zadanym prawdopodobieństwem"""
+    flips = rng.random((len(words), 16)) < error_probability
+    return words ^ bits_to_words(flips)
+
+def _simulate_shard(error_probability, num_words, seed):
+    """symuluje transmisję num_words losowych bajtów przez kanał BSC i zlicza błędy"""
+    rng = np.random.default_rng(seed)
+    counters = {"words": 0, "channel_bit_errors": 0, "bit_errors": 0, "word_errors": 0}
+
+    for start in range(0, num_words, SIM_CHUNK_WORDS):
+        n = min(SIM_CHUNK_WORDS, num_words - start)
+        data = rng.integers(0, 256, n, dtype=np.uint8)
+        words = encode_words(data)
+        received = binary_symmetric_channel(words, error_probability, rng)
+        difference = fix_errors(received) ^ data  # bity danych, które zostały błędne po naprawie
+
+        channel_errors = (words ^ received).view(np.uint8)
+        counters["words"] += n
+        counters["channel_bit_errors"] += int(POPCOUNT_TABLE[channel_errors].sum(dtype=np.int64))
+        counters["bit_errors"] += int(POPCOUNT_TABLE[difference].sum(dtype=np.int64))
+        counters["word_errors"] += int(np.count_nonzero(difference))
+
+    return error_probability, counters
+
+def simulate_ber(probabilities, num_words=1_000_000, seed=0, workers=None):
+    """symulacja Monte-Carlo: BER/WER po naprawie w funkcji prawdopodobieństwa błędu kanału"""
+    if num_words <= 0:
+        raise ValueError(f"liczba słów symulacji musi być dodatnia, podano {num_words}")
+    # każde zadanie dostaje własne ziarno - wynik nie zależy od liczby procesów
+    shards = [(p, min(SIM_SHARD_WORDS, num_words - start))
+              for p in probabilities for start in range(0, num_words, SIM_SHARD_WORDS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(shards))
+    jobs = [(p, n, shard_seed) for (p, n), shard_seed in zip(shards, seeds)]
+
+    if workers == 1:
+        results = [_simulate_shard(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_simulate_shard, *zip(*jobs)))
+
+    totals = {p: {"words": 0, "channel_bit_errors": 0, "bit_errors": 0, "word_errors": 0}
+              for p in probabilities}
+    for p, counters in results:
+        for key, value in counters.items():
+            totals[p][key] += value
+
+    curve = []
+    print(f"\n{'p kanału':>10} {'BER kanału':>12} {'BER po naprawie':>16} {'WER':>12}")
+    for p in probabilities:
+        t = totals[p]
+        point = {
+            "error_probability": float(p),
+            "words": t["words"],
+            "channel_ber": t["channel_bit_errors"] / (t["words"] * 16),
+            "ber": t["bit_errors"] / (t["words"] * 8),
+            "wer": t["word_errors"] / t["words"],
+        }
+        curve.append(point)
+        print(f"{p:>10.2e} {point['channel_ber']:>12.3e} {point['ber']:>16.3e} {point['wer']:>12.3e}")
+    return curve
+
+def _encode_shard(data, words, start, stop):
+    """koduje fragment [start, stop) bufora danych do wspólnej tablicy słów"""
+    words[start:stop] = encode_words(data[start:stop])
+
+def _correct_shard(words, corrected, status, start, stop):
+    """naprawia fragment [start, stop) słów do wspólnych tablic wynikowych"""
+    corrected[start:stop], status[start:stop] = correct_codewords(words[start:stop])
+
+def _shared_memory_worker(task, specs, start, stop):
+    """proces roboczy: podłącza się do pamięci współdzielonej i przetwarza swój fragment"""
+    blocks = [SharedMemory(name=name) for name, _, _ in specs]
+    try:
+        arrays = [np.ndarray(shape, dtype=dtype, buffer=block.buf)
+                  for block, (_, dtype, shape) in zip(blocks, specs)]
+        task(*arrays, start, stop)
+        del arrays  # widoki muszą zniknąć przed zamknięciem pamięci
+    finally:
+        for block in blocks:
+            block.close()
+
+def _run_sharded(task, inputs, outputs, workers, executor):
+    """dzieli tablice na fragmenty i wykonuje zadanie równolegle - w wątkach lub procesach"""
+    workers = workers or os.cpu_count() or 1
+    length = len(inputs[0])
+    bounds = np.linspace(0, length, workers + 1).astype(int)
+    starts, stops = bounds[:-1].tolist(), bounds[1:].tolist()
+
+    if executor == "thread":
+        # numpy zwalnia GIL w operacjach na tablicach, więc wątki pracują na tych samych danych bez kopiowania
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(task, *([array] * workers for array in inputs + outputs), starts, stops))
+        return outputs
+
+    # procesy dostają tylko nazwy bloków pamięci współdzielonej i granice fragmentów - bez kopiowania danych
+    blocks = []
+    shared = []
+    try:
+        for array in inputs + outputs:
+            blocks.append(SharedMemory(create=True, size=max(array.nbytes, 1)))
+        shared = [np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                  for array, block in zip(inputs + outputs, blocks)]
+        for index, array in enumerate(inputs):
+            shared[index][...] = array  # jedyna kopia danych wejściowych
+        specs = [(block.name, array.dtype.str, array.shape) for array, block in zip(inputs + outputs, blocks)]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_shared_memory_worker, repeat(task), repeat(specs), starts, stops))
+
+        return [view.copy() for view in shared[len(inputs):]]
+    finally:
+        del shared  # widoki muszą zniknąć przed zamknięciem pamięci (także po błędzie)
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+def parallel_encode(data, workers=None, executor="thread"):
+    """równoległe kodowanie bufora bajtów do słów uint16 - wynik identyczny z encode_words"""
+    data_bytes = np.frombuffer(data, dtype=np.uint8)
+    words = np.empty(len(data_bytes), dtype=np.uint16)
+    return _run_sharded(_encode_shard, [data_bytes], [words], workers, executor)[0]
+
+def parallel_correct(words, workers=None, executor="thread"):
+    """równoległa naprawa słów uint16 - wynik identyczny z correct_codewords"""
+    corrected = np.empty(len(words), dtype=np.uint16)
+    status = np.empty(len(words), dtype=np.uint8)
+    corrected, status = _run_sharded(_correct_shard, [words], [corrected, status], workers, executor)
+    return corrected, status
+
+def benchmark_parallel(size_mb=64, max_workers=None, executor="thread"):
+    """benchmark skalowania kodowania i naprawy od 1 do N rdzeni"""
+    max_workers = max_workers or os.cpu_count() or 1
+    data = np.random.randint(0, 256, size_mb * 1024 * 1024, dtype=np.uint8)
+    damaged = binary_symmetric_channel(encode_words(data), 1e-3, np.random.default_rng(0))
+    expected_words = encode_words(data)
+    expected_corrected, expected_status = correct_codewords(damaged)
+
+    results = []
+    print(f"\n{'rdzenie':>8} {'kodowanie MB/s':>15} {'naprawa MB/s':>13} {'przyspieszenie':>15}")
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        words = parallel_encode(data, workers, executor)
+        encode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        corrected, status = parallel_correct(damaged, workers, executor)
+        correct_time = time.perf_counter() - start
+
+        # wyniki równoległe muszą być identyczne z sekwencyjnymi
+        assert np.array_equal(words, expected_words)
+        assert np.array_equal(corrected, expected_corrected) and np.array_equal(status, expected_status)
+
+        results.append({"workers": workers, "encode_mb_per_s": size_mb / encode_time,
+                        "correct_mb_per_s": size_mb / correct_time})
+        speedup = results[-1]["correct_mb_per_s"] / results[0]["correct_mb_per_s"]
+        print(f"{workers:>8} {results[-1]['encode_mb_per_s']:>15.1f} "
+              f"{results[-1]['correct_mb_per_s']:>13.1f} {speedup:>14.2f}x")
+    return results
+
+def encode_file(input_path=INPUT_FILE, encoded_path=ENCODED_FILE, chunk_size=CHUNK_SIZE):
+    """koduje dowolny plik porcjami do pliku binarnego ze słowami kodowymi uint16"""
+    with open(input_path, "rb") as src, open(encoded_path, "wb") as dst:
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            dst.write(encode_words(chunk).astype(CODEWORD_DTYPE).tobytes())
+
+def _map_encoded_file(encoded_path, mode):
+    """mapuje plik ze słowami kodowymi do pamięci (None dla pustego pliku)"""
+    if os.path.getsize(encoded_path) == 0:
+        return None
+    return np.memmap(encoded_path, dtype=CODEWORD_DTYPE, mode=mode)
+
+def damage_encoded_file(encoded_path=ENCODED_FILE, error_probability=1e-3, seed=None, chunk_words=CHUNK_SIZE):
+    """uszkadza plik ze słowami kodowymi w miejscu - kanał BSC, do testowania naprawy"""
+    words = _map_encoded_file(encoded_path, "r+")
+    if words is None:
+        return
+    rng = np.random.default_rng(seed)
+    for start in range(0, len(words), chunk_words):
+        chunk = words[start:start + chunk_words]
+        chunk[:] = binary_symmetric_channel(chunk.astype(np.uint16), error_probability, rng)
+    words.flush()
+
+def repair_encoded_file(encoded_path=ENCODED_FILE, in_place=True, chunk_words=CHUNK_SIZE):
+    """sprawdza i naprawia plik ze słowami kodowymi przez memmap - zapisuje tylko poprawione słowa"""
+    counters = {"words": 0, "clean": 0, "corrected": 0, "uncorrectable": 0}
+    words = _map_encoded_file(encoded_path, "r+" if in_place else "r")
+    if words is None:
+        return counters
+
+    # sekwencyjny przebieg po pliku - system stronicuje dane, cały plik nie trafia do pamięci
+    for start in range(0, len(words), chunk_words):
+        chunk = words[start:start + chunk_words]
+        corrected, status = correct_codewords(chunk.astype(np.uint16))
+        repaired = np.flatnonzero((status == STATUS_CORRECTED_1) | (status == STATUS_CORRECTED_2))
+        if in_place and len(repaired):
+            chunk[repaired] = corrected[repaired]
+
+        counts = np.bincount(status, minlength=4)
+        counters["words"] += len(chunk)
+        counters["clean"] += int(counts[STATUS_CLEAN])
+        counters["corrected"] += len(repaired)
+        counters["uncorrectable"] += int(counts[STATUS_UNCORRECTABLE])
+
+    if in_place:
+        words.flush()
+    print(f"\nsprawdzono słów: {counters['words']}, naprawiono: {counters['corrected']}, "
+          f"nienaprawialnych: {counters['uncorrectable']}")
+    return counters
+
+def decode_encoded_file(encoded_path=ENCODED_FILE, output_path=OUTPUT_FILE, chunk_words=CHUNK_SIZE):
+    """dekoduje plik ze słowami kodowymi przez memmap do pliku z danymi (z naprawą błędów)"""
+    words = _map_encoded_file(encoded_path, "r")
+    with open(output_path, "wb") as dst:
+        if words is None:
+            return
+        for start in range(0, len(words), chunk_words):
+            dst.write(fix_errors(words[start:start + chunk_words].astype(np.uint16)).tobytes())
+
 def main():
     """główne menu programu - wybór opcji"""
     print("1. Przetwarzanie wbudowanej wiadomości z 1 błędem")
     print("2. Przetwarzanie wbudowanej wiadomości z 2 błędami")
     print("3. Przetwarzanie z pliku")
+    print("4. Benchmark kodowania")
+    print("5. Przetwarzanie z pliku strumieniowo (dowolny plik binarny)")
+    print("6. Symulacja BER/WER w kanale BSC")
+    print("7. Benchmark skalowania na wielu rdzeniach")
+    print("8. Kodowanie pliku do słów kodowych, uszkodzenie, naprawa w miejscu i dekodowanie")
 
     choice = input("Wybierz opcję: ")
 
@@ -192,5 +535,23 @@ def main():
     elif choice == "3":
         process_file()
 
+    elif choice == "4":
+        benchmark_encode()
+
+    elif choice == "5":
+        process_file_stream()
+
+    elif choice == "6":
+        simulate_ber(np.logspace(-4, -1, 7))
+
+    elif choice == "7":
+        benchmark_parallel()
+
+    elif choice == "8":
+        encode_file()
+        damage_encoded_file()
+        repair_encoded_file()
+        decode_encoded_file()
+
 if __name__ == "__main__":
     main()
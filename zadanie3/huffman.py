@@ -0,0 +1,145 @@
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from huffman_codec import (calculate_frequencies, compress, decompress, compress_file_blocks, decompress_file_blocks,
+                           StreamEncoder, StreamDecoder, DEFAULT_BLOCK_SIZE, benchmark_decoders, benchmark_code_headers,
+                           benchmark_byte_mode, benchmark_blocks)
+
+# Rozmiary korpusów dla "bench --suite corpus"
+CORPUS_SIZES = {"small": 16 * 1024, "medium": 1024 * 1024, "large": 16 * 1024 * 1024}
+
+def make_corpus(size, sample_filepath="plik_do_zakodowania.txt"):
+    """
+    Korpus testowy: tekst o rozkładzie znaków z pliku wzorcowego przeplatany fragmentami binarnymi.
+    """
+    frequencies, _ = calculate_frequencies(sample_filepath)
+    text = "".join(random.choices(list(frequencies), weights=list(frequencies.values()), k=size)).encode('utf-8')
+    binary = bytes(random.choices(range(256), weights=[1 + (i % 16 == 0) * 50 for i in range(256)], k=size // 4))
+    half = size // 2
+    return (text[:half] + binary + text[half:])[:size]
+
+def benchmark_corpora(sizes=CORPUS_SIZES, block_size=DEFAULT_BLOCK_SIZE, repeats=3, workers=None):
+    """
+    Mierzy stopień kompresji i przepustowość compress()/decompress() oraz kodera i dekodera
+    strumieniowego na korpusach różnej wielkości (najlepszy czas z repeats powtórzeń).
+    """
+    executor = ProcessPoolExecutor(max_workers=workers) if workers and workers > 1 else None
+    results = []
+    try:
+        print(f"{'korpus':>8} {'rozmiar':>10} {'stopień':>8} {'compress':>10} {'decompress':>11} "
+              f"{'strum. kod.':>12} {'strum. dek.':>12}  (MB/s)")
+        for name, size in sizes.items():
+            data = make_corpus(size)
+            megabytes = len(data) / (1024 * 1024)
+            timings = {"compress": [], "decompress": [], "encode": [], "decode": []}
+            for _ in range(repeats):
+                start = time.perf_counter()
+                container = compress(data, block_size, executor)
+                timings["compress"].append(time.perf_counter() - start)
+                start = time.perf_counter()
+                assert decompress(container, executor) == data
+                timings["decompress"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                encoder = StreamEncoder(block_size)
+                stream = encoder.write(data) + encoder.flush()
+                timings["encode"].append(time.perf_counter() - start)
+                start = time.perf_counter()
+                assert StreamDecoder().feed(stream) == data
+                timings["decode"].append(time.perf_counter() - start)
+
+            speeds = {key: megabytes / min(values) for key, values in timings.items()}
+            print(f"{name:>8} {len(data):>10} {len(container) / len(data):>8.3f} {speeds['compress']:>10.2f} "
+                  f"{speeds['decompress']:>11.2f} {speeds['encode']:>12.2f} {speeds['decode']:>12.2f}")
+            results.append((name, len(data), len(container) / len(data), speeds))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kodowanie Huffmana: klient, serwer, kompresja plików i benchmarki.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    client = commands.add_parser("client", help="wysyła pliki do serwera")
+    client.add_argument("files", nargs="+")
+    client.add_argument("--host", default="localhost")
+    client.add_argument("--port", type=int, default=65432)
+    client.add_argument("--binary", action="store_true", help="tryb bajtowy (dowolne pliki)")
+    client.add_argument("--block-size", type=int, help="transfer blokowy z blokami tej wielkości")
+    client.add_argument("--containers", action="store_true", help="pliki to kontenery z 'compress' (sendfile)")
+    client.add_argument("--cache-dir", help="katalog pamięci podręcznej słowników")
+    client.add_argument("--workers", type=int, help="procesy kodujące bloki")
+    client.add_argument("--metrics", choices=["text", "json", "prometheus"], help="wypisuje pomiary etapów")
+    client.add_argument("--metrics-file", help="plik na pomiary (.prom - format Prometheusa, inaczej JSON lines)")
+    client.add_argument("--send-buffer", type=int, help="rozmiar SO_SNDBUF gniazda w bajtach")
+
+    server = commands.add_parser("server", help="uruchamia serwer dekodujący")
+    server.add_argument("--host", default="0.0.0.0")
+    server.add_argument("--port", type=int, default=65432)
+    server.add_argument("--backlog", type=int, default=512)
+    server.add_argument("--workers", type=int)
+    server.add_argument("--output-dir", default=".")
+    server.add_argument("--pipeline-depth", type=int, default=4)
+    server.add_argument("--recv-buffer", type=int, help="rozmiar SO_RCVBUF gniazda nasłuchującego w bajtach")
+    server.add_argument("--metrics-file", help="plik na pomiary zapisywany po zatrzymaniu serwera")
+
+    for name, help_text in (("compress", "kompresuje plik do kontenera bloków"),
+                            ("decompress", "dekompresuje kontener bloków")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("input")
+        command.add_argument("output")
+        command.add_argument("--workers", type=int, help="liczba procesów (domyślnie 1)")
+        if name == "compress":
+            command.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+
+    bench = commands.add_parser("bench", help="uruchamia benchmark")
+    bench.add_argument("--suite", default="corpus",
+                       choices=["corpus", "decoders", "headers", "bytes", "blocks", "server", "socket"])
+    bench.add_argument("--workers", type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "client":
+        from huffman_encoder_client import run_client
+        run_client(args.files, (args.host, args.port), args.binary, args.block_size, args.cache_dir,
+                   args.containers, args.workers, args.metrics, args.metrics_file, args.send_buffer)
+    elif args.command == "server":
+        from huffman_decoder_server import run_server
+        run_server(args.host, args.port, args.backlog, args.workers, args.output_dir, args.pipeline_depth,
+                   args.recv_buffer, args.metrics_file)
+    elif args.command in ("compress", "decompress"):
+        executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers and args.workers > 1 else None
+        try:
+            start = time.perf_counter()
+            if args.command == "compress":
+                blocks = compress_file_blocks(args.input, args.output, args.block_size, executor)
+                print(f"Zapisano {blocks} bloków do {args.output} ({time.perf_counter() - start:.2f} s).")
+            else:
+                written = decompress_file_blocks(args.input, args.output, executor)
+                print(f"Zapisano {written} bajtów do {args.output} ({time.perf_counter() - start:.2f} s).")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    elif args.suite == "corpus":
+        benchmark_corpora(workers=args.workers)
+    elif args.suite == "decoders":
+        benchmark_decoders()
+    elif args.suite == "headers":
+        benchmark_code_headers()
+    elif args.suite == "bytes":
+        benchmark_byte_mode()
+    elif args.suite == "blocks":
+        benchmark_blocks()
+    elif args.suite == "server":
+        from huffman_decoder_server import benchmark_server
+        benchmark_server(workers=args.workers)
+    elif args.suite == "socket":
+        from huffman_protocol import benchmark_socket_io
+        benchmark_socket_io()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1059 @@
+import hashlib
+import heapq
+import math
+import os
+import pickle
+import random
+import struct
+import time
+from collections import deque
+import numpy as np
+from huffman_protocol import (FRAME_HEADER, FRAME_BYTE_TABLE, FRAME_DATA, FRAME_END, FRAME_BLOCK_TRANSFER, FRAME_BLOCK,
+                              BLOCK_FRAME_HEADER, pack_frame, parse_frame_header, unpack_block_frame)
+
+# Domyślna szerokość (w bitach) głównej tablicy dekodującej
+DEFAULT_TABLE_BITS = 10
+# Maksymalna długość kodu - ogranicza rozmiar tablic drugiego poziomu i mieści się w 64-bitowym doładowaniu
+MAX_CODE_LENGTH = 20
+# Długość "kodu" dla wpisów tablicy, które nie odpowiadają żadnemu kodowi
+INVALID_LENGTH = 1 << 62
+# Liczba znaków kodowanych naraz przez HuffmanBitWriter
+ENCODE_CHUNK_SYMBOLS = 1 << 16
+# Liczba znaków czytanych z pliku naraz w trybie strumieniowym (jedna ramka danych)
+STREAM_CHUNK_CHARS = 1 << 20
+# Rozmiar alfabetu w trybie bajtowym
+BYTE_ALPHABET_SIZE = 256
+# Domyślny rozmiar bloku w trybie blokowym (każdy blok ma własny słownik)
+DEFAULT_BLOCK_SIZE = 256 * 1024
+# Nagłówek kontenera bloków: rozmiar bloku, liczba bloków
+BLOCK_CONTAINER_HEADER = struct.Struct('>II')
+# Wpis indeksu bloku: długość oryginalna, długość nagłówka słownika, długość danych, padding
+BLOCK_INDEX_ENTRY = struct.Struct('>IHIB')
+# Długość identyfikatora słownika (skrót nagłówka) w bajtach
+TABLE_ID_SIZE = 8
+# Liczba przedziałów na jeden bit log2(prawdopodobieństwa) przy kwantyzacji profilu częstotliwości
+PROFILE_BUCKETS_PER_BIT = 2
+
+class HuffmanNode:
+    """
+    Klasa reprezentująca węzeł drzewa Huffmana.
+    char - znak (None dla węzłów wewnętrznych)
+    freq - częstotliwość występowania znaku
+    left, right - wskaźniki na lewe i prawe dziecko
+    """
+    def __init__(self, char, freq):
+        self.char = char
+        self.freq = freq
+        self.left = None
+        self.right = None
+
+    def __lt__(self, other):
+        return self.freq < other.freq
+
+def calculate_frequencies(filepath):
+    """
+    Oblicza częstotliwość występowania każdego znaku w pliku.
+    Zwraca słownik częstotliwości i oryginalny tekst.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        text = f.read()
+    return calculate_text_frequencies(text), text
+
+def iter_text_chunks(filepath, chunk_chars=STREAM_CHUNK_CHARS):
+    """
+    Czyta plik tekstowy porcjami po chunk_chars znaków.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_chars)
+            if not chunk:
+                return
+            yield chunk
+
+def calculate_file_frequencies(filepath, chunk_chars=STREAM_CHUNK_CHARS):
+    """
+    Oblicza częstotliwość znaków w pliku, czytając go porcjami (stała pamięć).
+    """
+    frequencies = {}
+    for chunk in iter_text_chunks(filepath, chunk_chars):
+        calculate_text_frequencies(chunk, frequencies)
+    return frequencies
+
+def calculate_text_frequencies(text, frequencies=None):
+    """
+    Oblicza częstotliwość występowania każdego znaku w tekście.
+    Jeśli podano słownik frequencies, liczności są do niego doliczane.
+    """
+    if frequencies is None:
+        frequencies = {}
+    for char in text:
+        frequencies[char] = frequencies.get(char, 0) + 1
+    return frequencies
+
+def build_huffman_tree(frequencies):
+    """
+    Buduje drzewo Huffmana na podstawie częstotliwości znaków.
+    Używa kolejki priorytetowej do łączenia węzłów.
+    """
+    priority_queue = [HuffmanNode(char, freq) for char, freq in frequencies.items()]
+    heapq.heapify(priority_queue)
+
+    while len(priority_queue) > 1:
+        left = heapq.heappop(priority_queue)
+        right = heapq.heappop(priority_queue)
+
+        merged = HuffmanNode(None, left.freq + right.freq)
+        merged.left = left
+        merged.right = right
+        heapq.heappush(priority_queue, merged)
+
+    return priority_queue[0]
+
+def generate_codes(node, current_code="", codes=None):
+    """
+    Generuje kody Huffmana dla każdego znaku poprzez przejście po drzewie.
+    Zwraca słownik kodów (znak -> kod); wszystkie poziomy rekurencji wypełniają ten sam słownik.
+    """
+    if codes is None:
+        codes = {}
+    if node is None:
+        return codes
+
+    if node.char is not None:
+        codes[node.char] = current_code if current_code else "0"
+        return codes
+
+    generate_codes(node.left, current_code + "0", codes)
+    generate_codes(node.right, current_code + "1", codes)
+    return codes
+
+def canonical_codes(code_lengths):
+    """
+    Tworzy kanoniczne kody Huffmana na podstawie długości kodów (znak -> długość).
+    Znaki uporządkowane według (długość, znak) dostają kolejne kody, więc cały słownik
+    jest jednoznacznie opisany przez same długości.
+    """
+    codes = {}
+    code = 0
+    previous_length = 0
+    for char, length in sorted(code_lengths.items(), key=lambda item: (item[1], item[0])):
+        code <<= length - previous_length
+        codes[char] = format(code, f"0{length}b")
+        code += 1
+        previous_length = length
+    return codes
+
+def build_canonical_codes(frequencies):
+    """
+    Buduje kanoniczne kody Huffmana dla podanych częstotliwości znaków.
+    Długości kodów liczone są tablicowo (huffman_code_lengths), bez budowy drzewa z węzłów.
+    """
+    chars = list(frequencies)
+    lengths = huffman_code_lengths(np.fromiter(frequencies.values(), dtype=np.int64, count=len(chars)))
+    return canonical_codes({char: int(length) for char, length in zip(chars, lengths)})
+
+def _write_varint(output, value):
+    while value >= 0x80:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+    output.append(value)
+
+def _read_varint(data, position):
+    value = 0
+    shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError("Nagłówek słownika jest ucięty.")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+def _pack_code_header(ordered_lengths, symbols):
+    """
+    Nagłówek: maksymalna długość kodu, liczba symboli o każdej długości 1..max (varint),
+    a po nich symbole w porządku kanonicznym (bajty symboli podane przez wywołującego).
+    """
+    max_length = ordered_lengths[-1] if ordered_lengths else 0
+    counts = [0] * (max_length + 1)
+    for length in ordered_lengths:
+        counts[length] += 1
+
+    header = bytearray()
+    _write_varint(header, max_length)
+    for count in counts[1:]:
+        _write_varint(header, count)
+    header += symbols
+    return bytes(header)
+
+def _unpack_code_header(header):
+    """
+    Odczytuje nagłówek zapisany przez _pack_code_header.
+    Zwraca (liczby symboli dla długości 1..max, bajty symboli).
+    Nagłówki opisujące niemożliwe albo niepełne drzewo (nierówność Krafta niespełniona
+    lub ostra) albo kody dłuższe niż MAX_CODE_LENGTH są odrzucane.
+    """
+    max_length, position = _read_varint(header, 0)
+    if max_length > MAX_CODE_LENGTH:
+        raise ValueError(f"Nagłówek słownika ma kody dłuższe niż {MAX_CODE_LENGTH} bitów.")
+    counts = []
+    available = 1  # Liczba wolnych kodów na bieżącej długości
+    for length in range(1, max_length + 1):
+        count, position = _read_varint(header, position)
+        available = available * 2 - count
+        if available < 0:
+            raise ValueError("Nagłówek słownika opisuje nieprawidłowe kody.")
+        counts.append(count)
+    # Drzewo musi być pełne - wyjątkiem jest pojedynczy symbol (jeden kod "0") i pusty słownik
+    if available != 0 and counts not in ([], [1]):
+        raise ValueError("Nagłówek słownika opisuje niepełny zbiór kodów.")
+    return counts, bytes(header[position:])
+
+def _lengths_from_counts(counts, symbols):
+    if len(symbols) != sum(counts) or len(set(symbols)) != len(symbols):
+        raise ValueError("Liczba znaków w nagłówku słownika się nie zgadza.")
+    code_lengths = {}
+    symbol_iter = iter(symbols)
+    for length, count in enumerate(counts, start=1):
+        for _ in range(count):
+            code_lengths[next(symbol_iter)] = length
+    return code_lengths
+
+def serialize_code_lengths(codes):
+    """
+    Zapisuje słownik kanoniczny jako zwarty nagłówek binarny:
+    maksymalna długość kodu, liczba znaków o każdej długości 1..max (liczby w formacie varint),
+    a następnie znaki w porządku kanonicznym zakodowane w UTF-8.
+    """
+    order = sorted(codes.items(), key=lambda item: (len(item[1]), item[0]))
+    return _pack_code_header([len(code) for _, code in order],
+                             "".join(char for char, _ in order).encode('utf-8'))
+
+def deserialize_code_lengths(header):
+    """
+    Odczytuje nagłówek zapisany przez serialize_code_lengths.
+    Zwraca słownik długości kodów (znak -> długość).
+    """
+    counts, symbols = _unpack_code_header(header)
+    return _lengths_from_counts(counts, symbols.decode('utf-8'))
+
+def decode_table_from_header(header, table_bits=DEFAULT_TABLE_BITS):
+    """
+    Odtwarza kody kanoniczne i tablicę dekodującą wyłącznie z nagłówka.
+    """
+    return HuffmanDecodeTable(canonical_codes(deserialize_code_lengths(header)), table_bits)
+
+def iter_file_chunks(filepath, chunk_size=STREAM_CHUNK_CHARS):
+    """
+    Czyta dowolny plik binarny porcjami po chunk_size bajtów.
+    """
+    with open(filepath, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+def calculate_byte_frequencies(data):
+    """
+    Zlicza wystąpienia każdej wartości bajtu (tablica 256 liczności).
+    """
+    return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=BYTE_ALPHABET_SIZE)
+
+def calculate_file_byte_frequencies(filepath, chunk_size=STREAM_CHUNK_CHARS):
+    """
+    Zlicza bajty pliku przez odwzorowanie go w pamięci jako uint8, porcjami po chunk_size bajtów.
+    """
+    counts = np.zeros(BYTE_ALPHABET_SIZE, dtype=np.int64)
+    if os.path.getsize(filepath) == 0:
+        return counts
+    data = np.memmap(filepath, dtype=np.uint8, mode='r')
+    for start in range(0, len(data), chunk_size):
+        counts += np.bincount(data[start:start + chunk_size], minlength=BYTE_ALPHABET_SIZE)
+    return counts
+
+def _limit_code_lengths(sorted_lengths, max_length):
+    """
+    Skraca kody dłuższe niż max_length (sorted_lengths - długości symboli od najrzadszego,
+    więc nierosnące). Nadmiarowe kody dostają długość max_length, a nadwyżkę w nierówności Krafta
+    spłaca się, wydłużając o bit najdłuższe kody krótsze niż max_length. Długości przydzielane są
+    potem od nowa: najczęstsze symbole dostają najkrótsze kody. Zwraca listę w tej samej kolejności.
+    """
+    n = len(sorted_lengths)
+    if n > 1 << max_length:
+        raise ValueError(f"Za dużo symboli ({n}) dla kodów o długości najwyżej {max_length} bitów.")
+    length_counts = [0] * (max_length + 1)
+    for length in sorted_lengths:
+        length_counts[min(length, max_length)] += 1
+    kraft = sum(count << (max_length - length) for length, count in enumerate(length_counts) if length)
+    while kraft > 1 << max_length:
+        # Jeden kod max_length zostaje "przeniesiony" pod liść krótszego kodu, który się wydłuża
+        length_counts[max_length] -= 1
+        for length in range(max_length - 1, 0, -1):
+            if length_counts[length]:
+                length_counts[length] -= 1
+                length_counts[length + 1] += 2
+                break
+        kraft -= 1
+    limited = []
+    for length in range(1, max_length + 1):
+        limited += [length] * length_counts[length]
+    return limited[::-1]
+
+def huffman_code_lengths(counts, max_length=MAX_CODE_LENGTH):
+    """
+    Wyznacza długości kodów Huffmana dla tablicy liczności (indeks = symbol) bez budowy drzewa.
+    Algorytm Moffata-Katajainena działa w miejscu na posortowanej tablicy wag:
+    1. przebieg łączy węzły, zapisując wskaźniki na rodziców,
+    2. przebieg zamienia wskaźniki na głębokości węzłów wewnętrznych,
+    3. przebieg rozdziela głębokości na liście.
+    Kody dłuższe niż max_length są skracane (_limit_code_lengths).
+    Zwraca tablicę długości (0 dla symboli, które nie wystąpiły).
+    """
+    counts = np.asarray(counts)
+    lengths = np.zeros(len(counts), dtype=np.uint8)
+    symbols = np.flatnonzero(counts)
+    symbols = symbols[np.argsort(counts[symbols], kind='stable')]
+    n = len(symbols)
+    if n == 1:
+        lengths[symbols] = 1
+    if n <= 1:
+        return lengths
+
+    weights = counts[symbols].tolist()
+    weights[0] += weights[1]
+    root = 0
+    leaf = 2
+    for next_node in range(1, n - 1):
+        if leaf >= n or weights[root] < weights[leaf]:
+            weights[next_node] = weights[root]
+            weights[root] = next_node
+            root += 1
+        else:
+            weights[next_node] = weights[leaf]
+            leaf += 1
+        if leaf >= n or (root < next_node and weights[root] < weights[leaf]):
+            weights[next_node] += weights[root]
+            weights[root] = next_node
+            root += 1
+        else:
+            weights[next_node] += weights[leaf]
+            leaf += 1
+
+    weights[n - 2] = 0
+    for next_node in range(n - 3, -1, -1):
+        weights[next_node] = weights[weights[next_node]] + 1
+
+    available = 1
+    used = 0
+    depth = 0
+    root = n - 2
+    next_node = n - 1
+    while available > 0:
+        while root >= 0 and weights[root] == depth:
+            used += 1
+            root -= 1
+        while available > used:
+            weights[next_node] = depth
+            next_node -= 1
+            available -= 1
+        available = 2 * used
+        depth += 1
+        used = 0
+
+    if weights[0] > max_length:
+        weights = _limit_code_lengths(weights, max_length)
+    lengths[symbols] = weights
+    return lengths
+
+def build_byte_codes(counts):
+    """
+    Buduje kanoniczne kody dla alfabetu bajtowego.
+    Zwraca listę 256 kodów indeksowaną wartością bajtu (None dla bajtów, które nie wystąpiły),
+    którą HuffmanBitWriter przyjmuje zamiast słownika.
+    """
+    lengths = huffman_code_lengths(counts)
+    code_lengths = {int(symbol): int(lengths[symbol]) for symbol in np.flatnonzero(lengths)}
+    codes = [None] * BYTE_ALPHABET_SIZE
+    for symbol, code in canonical_codes(code_lengths).items():
+        codes[symbol] = code
+    return codes
+
+def serialize_byte_code_lengths(codes):
+    """
+    Zapisuje kody trybu bajtowego w tym samym formacie nagłówka co serialize_code_lengths,
+    z symbolami jako surowymi bajtami.
+    """
+    order = sorted((len(code), symbol) for symbol, code in enumerate(codes) if code is not None)
+    return _pack_code_header([length for length, _ in order], bytes(symbol for _, symbol in order))
+
+def deserialize_byte_code_lengths(header):
+    """
+    Odczytuje nagłówek zapisany przez serialize_byte_code_lengths.
+    Zwraca słownik długości kodów (bajt -> długość).
+    """
+    counts, symbols = _unpack_code_header(header)
+    return _lengths_from_counts(counts, symbols)
+
+def byte_decode_table_from_header(header, table_bits=DEFAULT_TABLE_BITS):
+    """
+    Odtwarza tablicę dekodującą trybu bajtowego z nagłówka.
+    Bajty są w tablicy znakami chr(0..255), więc wynik decode() koduje się z powrotem przez latin-1.
+    """
+    codes = canonical_codes(deserialize_byte_code_lengths(header))
+    return HuffmanDecodeTable({chr(symbol): code for symbol, code in codes.items()}, table_bits)
+
+def codes_from_header(header):
+    """
+    Odtwarza słownik kodów kanonicznych (znak -> kod) z nagłówka trybu znakowego.
+    """
+    return canonical_codes(deserialize_code_lengths(header))
+
+def byte_codes_from_header(header):
+    """
+    Odtwarza listę 256 kodów trybu bajtowego z nagłówka (jak zwraca build_byte_codes).
+    """
+    codes = [None] * BYTE_ALPHABET_SIZE
+    for symbol, code in canonical_codes(deserialize_byte_code_lengths(header)).items():
+        codes[symbol] = code
+    return codes
+
+def table_id(code_header):
+    """
+    Identyfikator słownika - skrót jego nagłówka, jednakowy po obu stronach połączenia.
+    """
+    return hashlib.sha256(code_header).digest()[:TABLE_ID_SIZE]
+
+def frequency_profile_key(frequencies, buckets_per_bit=PROFILE_BUCKETS_PER_BIT):
+    """
+    Klucz profilu częstotliwości: zbiór symboli z prawdopodobieństwami skwantowanymi
+    w skali logarytmicznej (buckets_per_bit przedziałów na bit długości kodu).
+    Pliki o zbliżonej statystyce dostają ten sam klucz. frequencies - słownik symbol -> liczność.
+    """
+    total = sum(frequencies.values())
+    profile = sorted((repr(symbol), round(-math.log2(count / total) * buckets_per_bit))
+                     for symbol, count in frequencies.items() if count)
+    return hashlib.sha1(repr(profile).encode('utf-8')).hexdigest()
+
+def encoded_size_bits(frequencies, codes):
+    """
+    Liczba bitów danych zakodowanych podanymi kodami (słownik albo lista 256 kodów).
+    Zwraca None, jeśli któryś symbol nie ma kodu.
+    """
+    total = 0
+    for symbol, count in frequencies.items():
+        code = codes.get(symbol) if isinstance(codes, dict) else codes[symbol]
+        if code is None:
+            return None
+        total += count * len(code)
+    return total
+
+class HuffmanBitWriter:
+    """
+    Pakuje kody Huffmana bezpośrednio do tablicy bajtów.
+    codes - słownik znak -> kod dla tekstu albo lista 256 kodów dla danych binarnych (bytes).
+    Niepełny ostatni bajt trzymany jest jako liczba całkowita (akumulator bitów),
+    dzięki czemu pamięć rośnie tylko o rozmiar skompresowanych danych.
+    """
+    def __init__(self, codes):
+        self.codes = codes
+        self.output = bytearray()
+        self.accumulator = 0
+        self.accumulator_bits = 0
+
+    def write(self, text):
+        """
+        Dopisuje zakodowany tekst. Tekst przetwarzany jest porcjami po ENCODE_CHUNK_SYMBOLS znaków:
+        kody porcji są łączone i zamieniane na liczbę w C (int(..., 2)), co w CPythonie
+        jest szybsze niż składanie akumulatora znak po znaku w pętli.
+        """
+        get_code = self.codes.__getitem__
+        for start in range(0, len(text), ENCODE_CHUNK_SYMBOLS):
+            bits = "".join(map(get_code, text[start:start + ENCODE_CHUNK_SYMBOLS]))
+            total_bits = self.accumulator_bits + len(bits)
+            value = (self.accumulator << len(bits)) | int(bits, 2)
+            rest = total_bits & 7
+            self.output += (value >> rest).to_bytes(total_bits >> 3, byteorder='big')
+            self.accumulator = value & ((1 << rest) - 1)
+            self.accumulator_bits = rest
+
+    def flush(self):
+        """
+        Dopełnia ostatni bajt zerami i zwraca (bajty, liczba bitów paddingu).
+        Po wywołaniu pisarz jest pusty i może kodować kolejne dane.
+        """
+        padding_amount = (8 - self.accumulator_bits) % 8
+        if self.accumulator_bits:
+            self.output.append(self.accumulator << padding_amount)
+        output = self.output
+        self.output = bytearray()
+        self.accumulator = 0
+        self.accumulator_bits = 0
+        return output, padding_amount
+
+def encode_text(text, codes):
+    """
+    Koduje tekst używając słownika kodów Huffmana.
+    Zwraca tablicę bajtów i liczbę bitów paddingu dodanych na końcu.
+    """
+    writer = HuffmanBitWriter(codes)
+    writer.write(text)
+    return writer.flush()
+
+def remove_padding(padded_encoded_text, padding_info_byte):
+    """
+    Usuwa padding (wypełnienie) z zakodowanego tekstu.
+    padding_info_byte zawiera informację o liczbie bitów paddingu dodanych na końcu.
+    """
+    padding_amount = int.from_bytes(padding_info_byte, byteorder='big')
+    if padding_amount == 0:
+        return padded_encoded_text
+    return padded_encoded_text[:-padding_amount]
+
+def decode_text(encoded_text, huffman_codes):
+    """
+    Dekoduje tekst zakodowany metodą Huffmana.
+    encoded_text - tekst w formie ciągu bitów
+    huffman_codes - słownik kodów Huffmana
+    """
+    # Tworzymy odwrócony słownik kodów (kod -> znak)
+    reverse_codes = {v: k for k, v in huffman_codes.items()}
+    if not reverse_codes:
+        return ""
+
+    current_code = ""
+    decoded_text = ""
+
+    # Dekodujemy tekst bit po bicie
+    for bit in encoded_text:
+        current_code += bit
+        if current_code in reverse_codes:
+            character = reverse_codes[current_code]
+            decoded_text += character
+            current_code = ""
+
+    return decoded_text
+
+class HuffmanDecodeTable:
+    """
+    Tablica dekodująca Huffmana czytająca po table_bits bitów naraz.
+    Każdy wpis głównej tablicy zawiera wszystkie znaki, które w całości mieszczą się
+    w oknie table_bits bitów, oraz liczbę zużytych bitów. Kody dłuższe niż okno
+    są dekodowane przez tablice drugiego poziomu, indeksowane kolejnymi bitami
+    (najwyżej MAX_CODE_LENGTH - table_bits bitów, dłuższe kody są odrzucane).
+    """
+    def __init__(self, huffman_codes, table_bits=DEFAULT_TABLE_BITS):
+        self.table_bits = table_bits
+        size = 1 << table_bits
+
+        # Tablica jednego znaku: indeks -> (znak, długość kodu) albo lista dłuższych kodów
+        single = [None] * size
+        long_codes = {}
+        for char, code in huffman_codes.items():
+            length = len(code)
+            if length > MAX_CODE_LENGTH:
+                raise ValueError(f"Kod dłuższy niż {MAX_CODE_LENGTH} bitów.")
+            value = int(code, 2)
+            if length <= table_bits:
+                shift = table_bits - length
+                for index in range(value << shift, (value + 1) << shift):
+                    single[index] = (char, length)
+            else:
+                prefix = value >> (length - table_bits)
+                long_codes.setdefault(prefix, []).append((char, code[table_bits:]))
+
+        # Tablice drugiego poziomu dla kodów dłuższych niż okno
+        subtables = {}
+        for prefix, suffixes in long_codes.items():
+            sub_bits = max(len(suffix) for _, suffix in suffixes)
+            sub_entries = [None] * (1 << sub_bits)
+            for char, suffix in suffixes:
+                shift = sub_bits - len(suffix)
+                value = int(suffix, 2)
+                for index in range(value << shift, (value + 1) << shift):
+                    sub_entries[index] = (char, len(suffix))
+            subtables[prefix] = (sub_bits, sub_entries)
+
+        # Tablica główna: wpis = (znaki, zużyte bity, pierwszy znak, długość pierwszego kodu, podtablica).
+        # Indeksy, które nie zaczynają żadnego kodu, dostają wpis, którego nigdy nie da się zużyć.
+        mask = size - 1
+        self.entries = [("", INVALID_LENGTH, None, INVALID_LENGTH, None)] * size
+        for index in range(size):
+            if index in subtables:
+                self.entries[index] = (None, table_bits, None, table_bits, subtables[index])
+                continue
+            chars = []
+            used = 0
+            while True:
+                entry = single[(index << used) & mask]
+                # Okno za ostatnim bitem wypełnione jest zerami, więc kod musi się w nim zmieścić
+                if entry is None or entry[1] > table_bits - used:
+                    break
+                chars.append(entry[0])
+                used += entry[1]
+            if chars:
+                self.entries[index] = ("".join(chars), used, chars[0], single[index][1], None)
+
+    def decode(self, encoded_bytes, padding_amount):
+        """
+        Dekoduje dane bezpośrednio z tablicy bajtów (bez ciągu bitów jako tekstu).
+        padding_amount - liczba bitów paddingu na końcu ostatniego bajtu.
+        Rzuca ValueError, jeśli dane zawierają bity niebędące kodem albo kończą się w środku kodu.
+        """
+        table_bits = self.table_bits
+        mask = (1 << table_bits) - 1
+        entries = self.entries
+        data_len = len(encoded_bytes)
+        total_bits = data_len * 8 - padding_amount
+
+        decoded_chunks = []
+        accumulator = 0
+        accumulator_bits = 0
+        position = 0
+        consumed = 0
+
+        while consumed < total_bits:
+            # Uzupełniamy akumulator bitów po 8 bajtów (za końcem danych - zerami),
+            # zużyte bity odcinamy dopiero przy uzupełnianiu
+            if accumulator_bits < table_bits:
+                chunk = encoded_bytes[position:position + 8]
+                accumulator = ((accumulator & ((1 << accumulator_bits) - 1)) << 64) | (int.from_bytes(chunk, byteorder='big') << (8 * (8 - len(chunk))))
+                accumulator_bits += 64
+                position += 8
+
+            chars, used, first_char, first_length, subtable = entries[(accumulator >> (accumulator_bits - table_bits)) & mask]
+
+            if subtable is not None:
+                # Kod dłuższy niż okno - pozostałe bity czytamy z tablicy drugiego poziomu
+                accumulator_bits -= table_bits
+                sub_bits, sub_entries = subtable
+                if accumulator_bits < sub_bits:
+                    chunk = encoded_bytes[position:position + 8]
+                    accumulator = ((accumulator & ((1 << accumulator_bits) - 1)) << 64) | (int.from_bytes(chunk, byteorder='big') << (8 * (8 - len(chunk))))
+                    accumulator_bits += 64
+                    position += 8
+                entry = sub_entries[(accumulator >> (accumulator_bits - sub_bits)) & ((1 << sub_bits) - 1)]
+                if entry is None or consumed + table_bits + entry[1] > total_bits:
+                    break
+                decoded_chunks.append(entry[0])
+                accumulator_bits -= entry[1]
+                consumed += table_bits + entry[1]
+            elif consumed + used <= total_bits:
+                decoded_chunks.append(chars)
+                accumulator_bits -= used
+                consumed += used
+            elif consumed + first_length <= total_bits:
+                # Koniec danych - część znaków z okna pochodzi z paddingu, bierzemy tylko pierwszy
+                decoded_chunks.append(first_char)
+                accumulator_bits -= first_length
+                consumed += first_length
+            else:
+                break
+
+        if consumed != total_bits:
+            raise ValueError(f"Dane nie dają się odkodować (bit {consumed} z {total_bits}).")
+        return "".join(decoded_chunks)
+
+    def decode_bytes(self, encoded_bytes, padding_amount):
+        """
+        Dekoduje dane trybu bajtowego (tablica zbudowana przez byte_decode_table_from_header).
+        Jak decode() rzuca ValueError dla danych, których nie da się odkodować.
+        """
+        return self.decode(encoded_bytes, padding_amount).encode('latin-1')
+
+def encode_block(block):
+    """
+    Koduje jeden blok danych binarnych własnym słownikiem trybu bajtowego.
+    Zwraca (nagłówek słownika, zakodowane bajty, padding). Funkcja działa w procesie roboczym.
+    """
+    codes = build_byte_codes(calculate_byte_frequencies(block))
+    encoded_bytes, padding_amount = encode_text(block, codes)
+    return serialize_byte_code_lengths(codes), bytes(encoded_bytes), padding_amount
+
+def decode_block(code_header, padding_amount, encoded_bytes):
+    """
+    Dekoduje jeden blok zakodowany przez encode_block.
+    Rzuca ValueError dla uszkodzonego nagłówka albo danych.
+    """
+    return byte_decode_table_from_header(code_header).decode_bytes(encoded_bytes, padding_amount)
+
+def iter_encoded_blocks(blocks, executor=None, window=None):
+    """
+    Koduje kolejne bloki, zwracając wyniki encode_block w kolejności bloków.
+    Z executor bloki kodowane są równolegle, ale w locie jest najwyżej window bloków
+    (domyślnie dwa na rdzeń), więc pamięć nie zależy od liczby bloków.
+    """
+    if executor is None:
+        yield from map(encode_block, blocks)
+        return
+    window = window or 2 * (os.cpu_count() or 1)
+    in_flight = deque()
+    for block in blocks:
+        in_flight.append(executor.submit(encode_block, block))
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+def compress_blocks(data, block_size=DEFAULT_BLOCK_SIZE, executor=None):
+    """
+    Kompresuje dane w niezależnych blokach po block_size bajtów.
+    Kontener: BLOCK_CONTAINER_HEADER, indeks (BLOCK_INDEX_ENTRY na blok), a po nim kolejno
+    nagłówek słownika i zakodowane dane każdego bloku - dowolny blok można odkodować osobno.
+    """
+    blocks = [data[start:start + block_size] for start in range(0, len(data), block_size)]
+    index = bytearray(BLOCK_CONTAINER_HEADER.pack(block_size, len(blocks)))
+    payload = bytearray()
+    for block, (code_header, encoded_bytes, padding_amount) in zip(blocks, iter_encoded_blocks(blocks, executor)):
+        index += BLOCK_INDEX_ENTRY.pack(len(block), len(code_header), len(encoded_bytes), padding_amount)
+        payload += code_header
+        payload += encoded_bytes
+    return bytes(index + payload)
+
+def compress_file_blocks(input_path, output_path, block_size=DEFAULT_BLOCK_SIZE, executor=None):
+    """
+    Kompresuje plik do kontenera bloków na dysku (format jak w compress_blocks), czytając go porcjami.
+    Indeks zapisywany jest na końcu w miejsce zarezerwowane na początku pliku.
+    Zwraca liczbę bloków.
+    """
+    file_size = os.path.getsize(input_path)
+    block_count = -(-file_size // block_size)
+    entries = []
+    with open(output_path, 'wb') as f:
+        f.write(BLOCK_CONTAINER_HEADER.pack(block_size, block_count))
+        f.write(bytes(block_count * BLOCK_INDEX_ENTRY.size))
+        blocks = iter_file_chunks(input_path, block_size)
+        for code_header, encoded_bytes, padding_amount in iter_encoded_blocks(blocks, executor):
+            original_length = min(block_size, file_size - len(entries) * block_size)
+            entries.append(BLOCK_INDEX_ENTRY.pack(original_length, len(code_header), len(encoded_bytes),
+                                                  padding_amount))
+            f.write(code_header)
+            f.write(encoded_bytes)
+        f.seek(BLOCK_CONTAINER_HEADER.size)
+        f.write(b"".join(entries))
+    return block_count
+
+def read_block_index_file(container_path):
+    """
+    Odczytuje z dysku tylko nagłówek i indeks kontenera bloków (patrz read_block_index).
+    """
+    with open(container_path, 'rb') as f:
+        header = f.read(BLOCK_CONTAINER_HEADER.size)
+        _, block_count = BLOCK_CONTAINER_HEADER.unpack(header)
+        return read_block_index(header + f.read(block_count * BLOCK_INDEX_ENTRY.size))
+
+def read_block_index(container):
+    """
+    Odczytuje indeks kontenera bloków.
+    Zwraca listę (przesunięcie, długość oryginalna, długość nagłówka, długość danych, padding).
+    """
+    _, block_count = BLOCK_CONTAINER_HEADER.unpack_from(container, 0)
+    offset = BLOCK_CONTAINER_HEADER.size + block_count * BLOCK_INDEX_ENTRY.size
+    index = []
+    for entry in BLOCK_INDEX_ENTRY.iter_unpack(container[BLOCK_CONTAINER_HEADER.size:offset]):
+        original_length, header_length, encoded_length, padding_amount = entry
+        index.append((offset, original_length, header_length, encoded_length, padding_amount))
+        offset += header_length + encoded_length
+    return index
+
+def _decode_indexed_block(container, entry):
+    offset, _, header_length, encoded_length, padding_amount = entry
+    encoded = memoryview(container)[offset + header_length:offset + header_length + encoded_length]
+    return decode_block(container[offset:offset + header_length], padding_amount, encoded)
+
+def decompress_block(container, block_number, index=None):
+    """
+    Dekoduje pojedynczy blok kontenera bez dekodowania poprzednich.
+    """
+    index = index if index is not None else read_block_index(container)
+    return _decode_indexed_block(container, index[block_number])
+
+def decompress_blocks(container, executor=None):
+    """
+    Dekoduje cały kontener bloków, z executor - równolegle.
+    """
+    index = read_block_index(container)
+    if executor is None:
+        return b"".join(_decode_indexed_block(container, entry) for entry in index)
+    futures = []
+    for offset, _, header_length, encoded_length, padding_amount in index:
+        code_header = container[offset:offset + header_length]
+        encoded = container[offset + header_length:offset + header_length + encoded_length]
+        futures.append(executor.submit(decode_block, code_header, padding_amount, encoded))
+    return b"".join(future.result() for future in futures)
+
+def decompress_file_blocks(container_path, output_path, executor=None, window=None):
+    """
+    Dekoduje kontener bloków z dysku do pliku, blok po bloku (z executor - do window bloków naraz).
+    Zwraca liczbę zapisanych bajtów.
+    """
+    index = read_block_index_file(container_path)
+    window = window or 2 * (os.cpu_count() or 1)
+    written = 0
+    in_flight = deque()
+    with open(container_path, 'rb') as source, open(output_path, 'wb') as output:
+        for offset, _, header_length, encoded_length, padding_amount in index:
+            source.seek(offset)
+            code_header = source.read(header_length)
+            encoded = source.read(encoded_length)
+            if executor is None:
+                written += output.write(decode_block(code_header, padding_amount, encoded))
+                continue
+            in_flight.append(executor.submit(decode_block, code_header, padding_amount, encoded))
+            if len(in_flight) >= window:
+                written += output.write(in_flight.popleft().result())
+        while in_flight:
+            written += output.write(in_flight.popleft().result())
+    return written
+
+def compress(data, block_size=DEFAULT_BLOCK_SIZE, executor=None):
+    """
+    Kompresuje bajty do samodzielnego kontenera bloków (compress_blocks).
+    """
+    return compress_blocks(bytes(data), block_size, executor)
+
+def decompress(container, executor=None):
+    """
+    Odwrotność compress().
+    """
+    return decompress_blocks(container, executor)
+
+class StreamEncoder:
+    """
+    Koder strumieniowy: dane dopisywane dowolnymi porcjami są dzielone na bloki po block_size bajtów,
+    a każdy pełny blok od razu zamieniany na ramkę FRAME_BLOCK. Wynik to ten sam ciąg ramek,
+    który klient wysyła w transferze blokowym (FRAME_BLOCK_TRANSFER ... FRAME_END),
+    więc można go zapisać do pliku albo wysłać gniazdem.
+    """
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE):
+        self.block_size = block_size
+        self._pending = bytearray()
+        self._started = False
+
+    def _start(self):
+        if self._started:
+            return b""
+        self._started = True
+        return pack_frame(FRAME_BLOCK_TRANSFER)
+
+    def _block_frame(self, block):
+        code_header, encoded_bytes, padding_amount = encode_block(block)
+        return pack_frame(FRAME_BLOCK, BLOCK_FRAME_HEADER.pack(padding_amount, len(code_header)),
+                          code_header, encoded_bytes)
+
+    def write(self, data):
+        """
+        Dopisuje dane; zwraca ramki dla bloków, które się zapełniły (może być puste).
+        """
+        output = bytearray(self._start())
+        self._pending += data
+        full = len(self._pending) - len(self._pending) % self.block_size
+        for start in range(0, full, self.block_size):
+            output += self._block_frame(self._pending[start:start + self.block_size])
+        del self._pending[:full]
+        return bytes(output)
+
+    def flush(self):
+        """
+        Koduje niepełny ostatni blok i kończy strumień ramką FRAME_END.
+        Po wywołaniu koder może rozpocząć nowy strumień.
+        """
+        output = bytearray(self._start())
+        if self._pending:
+            output += self._block_frame(self._pending)
+        output += pack_frame(FRAME_END)
+        self._pending = bytearray()
+        self._started = False
+        return bytes(output)
+
+class StreamDecoder:
+    """
+    Dekoder strumieniowy ramek trybu bajtowego i blokowego (StreamEncoder, send_file_blocks,
+    send_file z binary=True). Przyjmuje dane dowolnymi porcjami i zwraca odkodowane bajty
+    każdej kompletnej ramki. finished staje się True po ramce FRAME_END.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self._table = None
+        self.finished = False
+
+    def feed(self, data):
+        """
+        Dopisuje dane strumienia; zwraca bajty odkodowane z ramek, które się skompletowały.
+        """
+        self._buffer += data
+        output = bytearray()
+        position = 0
+        while len(self._buffer) - position >= FRAME_HEADER.size:
+            frame_type, length = parse_frame_header(self._buffer[position:position + FRAME_HEADER.size])
+            end = position + FRAME_HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            payload = memoryview(self._buffer)[position + FRAME_HEADER.size:end]
+            if frame_type == FRAME_BLOCK:
+                output += decode_block(*unpack_block_frame(payload))
+            elif frame_type == FRAME_BYTE_TABLE:
+                self._table = byte_decode_table_from_header(bytes(payload))
+            elif frame_type == FRAME_DATA:
+                if self._table is None:
+                    raise ValueError("Ramka danych przed słownikiem kodowym.")
+                output += self._table.decode_bytes(payload[1:], payload[0])
+            elif frame_type == FRAME_END:
+                self._table = None
+                self.finished = True
+            elif frame_type == FRAME_BLOCK_TRANSFER:
+                self.finished = False
+            else:
+                raise ValueError(f"Ramka typu {frame_type} nie należy do strumienia bajtowego.")
+            payload.release()
+            position = end
+        del self._buffer[:position]
+        return bytes(output)
+
+def _check_rejects_corrupt_input(text, huffman_codes, table_bits=DEFAULT_TABLE_BITS):
+    """
+    Dane ucięte o ostatni bit najdłuższego kodu oraz bity spoza słownika jednoznakowego
+    muszą kończyć się ValueError, a nie skróconym wynikiem.
+    """
+    longest = max(huffman_codes, key=lambda char: len(huffman_codes[char]))
+    encoded_bytes, padding_amount = encode_text(text + longest, huffman_codes)
+    if padding_amount == 7:
+        encoded_bytes, padding_amount = encoded_bytes[:-1], 0
+    else:
+        padding_amount += 1
+    corrupt_inputs = [(HuffmanDecodeTable(huffman_codes, table_bits), encoded_bytes, padding_amount),
+                      (decode_table_from_header(serialize_code_lengths({'a': '0'})), b'\x0f\xff', 0)]
+    for table, data, padding in corrupt_inputs:
+        try:
+            table.decode(data, padding)
+        except ValueError:
+            continue
+        raise AssertionError("Dekoder przyjął dane, których nie da się odkodować.")
+
+def benchmark_decoders(size_mb=1, table_bits=DEFAULT_TABLE_BITS, sample_filepath="plik_do_zakodowania.txt"):
+    """
+    Porównuje przepustowość (MB/s) dekodowania bit po bicie (decode_text)
+    z dekodowaniem tablicowym (HuffmanDecodeTable) na tekście o rozkładzie znaków z pliku wzorcowego.
+    Sprawdza też, że dekoder tablicowy odrzuca dane ucięte w środku kodu i bity spoza słownika.
+    """
+    frequencies, _ = calculate_frequencies(sample_filepath)
+    text = "".join(random.choices(list(frequencies), weights=list(frequencies.values()), k=size_mb * 1024 * 1024))
+    huffman_codes = generate_codes(build_huffman_tree(calculate_text_frequencies(text)), "", {})
+    encoded_bytes, padding_amount = encode_text(text, huffman_codes)
+
+    start = time.perf_counter()
+    bit_string = "".join(format(byte, "08b") for byte in encoded_bytes)
+    reference = decode_text(remove_padding(bit_string, padding_amount.to_bytes(1, byteorder='big')), huffman_codes)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = HuffmanDecodeTable(huffman_codes, table_bits).decode(encoded_bytes, padding_amount)
+    table_time = time.perf_counter() - start
+
+    assert decoded == reference == text
+    _check_rejects_corrupt_input(text, huffman_codes, table_bits)
+    print(f"decode_text:        {size_mb / reference_time:8.2f} MB/s")
+    print(f"HuffmanDecodeTable: {size_mb / table_time:8.2f} MB/s ({reference_time / table_time:.1f}x)")
+    return size_mb / reference_time, size_mb / table_time
+
+def benchmark_code_headers(sizes=(100, 1024 * 1024), repeats=100, sample_filepath="plik_do_zakodowania.txt"):
+    """
+    Porównuje rozmiar nagłówka i czas odtworzenia dekodera po stronie serwera
+    dla słownika przesyłanego przez pickle oraz dla nagłówka kodów kanonicznych.
+    Czas obejmuje deserializację i budowę HuffmanDecodeTable (średnia z repeats powtórzeń).
+    """
+    frequencies, _ = calculate_frequencies(sample_filepath)
+    results = []
+    for size in sizes:
+        text = "".join(random.choices(list(frequencies), weights=list(frequencies.values()), k=size))
+        codes = build_canonical_codes(calculate_text_frequencies(text))
+        pickled = pickle.dumps(codes)
+        header = serialize_code_lengths(codes)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            HuffmanDecodeTable(pickle.loads(pickled))
+        pickle_time = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            decode_table_from_header(header)
+        header_time = (time.perf_counter() - start) / repeats
+
+        encoded_bytes, _ = encode_text(text, codes)
+        print(f"Tekst {size} znaków ({len(codes)} symboli, dane {len(encoded_bytes)} B):")
+        print(f"  pickle:     {len(pickled):6d} B, {pickle_time * 1000:.3f} ms")
+        print(f"  kanoniczny: {len(header):6d} B, {header_time * 1000:.3f} ms")
+        results.append((size, len(pickled), pickle_time, len(header), header_time))
+    return results
+
+def benchmark_byte_mode(size_mb=4, sample_filepath="plik_do_zakodowania.txt"):
+    """
+    Porównuje czas przygotowania kodów (zliczanie + kody) w trybie znakowym z drzewem z węzłów
+    i w trybie bajtowym (np.bincount + huffman_code_lengths) z czasem samego kodowania danych.
+    """
+    frequencies, _ = calculate_frequencies(sample_filepath)
+    text = "".join(random.choices(list(frequencies), weights=list(frequencies.values()), k=size_mb * 1024 * 1024))
+    data = text.encode('utf-8')
+
+    start = time.perf_counter()
+    text_codes = generate_codes(build_huffman_tree(calculate_text_frequencies(text)))
+    text_setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    byte_codes = build_byte_codes(calculate_byte_frequencies(data))
+    byte_setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded_bytes, _ = encode_text(data, byte_codes)
+    byte_encode = time.perf_counter() - start
+
+    text_encoded, _ = encode_text(text, text_codes)
+    print(f"Tryb znakowy: przygotowanie kodów {text_setup * 1000:8.2f} ms, "
+          f"{len(text_encoded) / len(data):.3f} rozmiaru UTF-8")
+    print(f"Tryb bajtowy: przygotowanie kodów {byte_setup * 1000:8.2f} ms, "
+          f"{len(encoded_bytes) / len(data):.3f} rozmiaru, kodowanie {byte_encode * 1000:.0f} ms")
+    return text_setup, byte_setup, byte_encode
+
+def benchmark_blocks(size_mb=8, block_sizes=(64 * 1024, 256 * 1024, 1024 * 1024), worker_counts=(1, 2, 4),
+                     sample_filepath="plik_do_zakodowania.txt"):
+    """
+    Mierzy stopień kompresji oraz przepustowość kodowania i dekodowania trybu blokowego
+    w zależności od rozmiaru bloku i liczby procesów, na danych niejednorodnych
+    (na przemian tekst o rozkładzie z pliku wzorcowego, losowe bajty i długie serie zer).
+    Pierwszy wiersz to jeden słownik dla całych danych.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    frequencies, _ = calculate_frequencies(sample_filepath)
+    section = 512 * 1024
+    parts = []
+    for number in range(size_mb * 1024 * 1024 // section):
+        if number % 3 == 0:
+            text = "".join(random.choices(list(frequencies), weights=list(frequencies.values()), k=section))
+            parts.append(text.encode('utf-8')[:section])
+        elif number % 3 == 1:
+            parts.append(random.randbytes(section))
+        else:
+            parts.append(bytes(section - 64) + random.randbytes(64))
+    data = b"".join(parts)
+    size = len(data) / (1024 * 1024)
+
+    results = []
+    print(f"{'blok':>10} {'procesy':>8} {'stopień':>8} {'kod. MB/s':>10} {'dekod. MB/s':>12}")
+    for block_size in (len(data),) + tuple(block_sizes):
+        for workers in worker_counts if block_size != len(data) else (1,):
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                executor = executor if workers > 1 else None
+                start = time.perf_counter()
+                container = compress_blocks(data, block_size, executor)
+                encode_time = time.perf_counter() - start
+                start = time.perf_counter()
+                assert decompress_blocks(container, executor) == data
+                decode_time = time.perf_counter() - start
+            ratio = len(container) / len(data)
+            print(f"{block_size:>10} {workers:>8} {ratio:>8.3f} {size / encode_time:>10.2f} {size / decode_time:>12.2f}")
+            results.append((block_size, workers, ratio, size / encode_time, size / decode_time))
+    return results
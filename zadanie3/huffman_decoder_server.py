@@ -1,109 +1,372 @@
-import socket
-import pickle
+import asyncio
+import collections
+import functools
+import multiprocessing
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from huffman_codec import (calculate_frequencies, calculate_text_frequencies, build_canonical_codes,
+                           serialize_code_lengths, decode_table_from_header, byte_decode_table_from_header,
+                           encode_text, decode_block, table_id)
+from huffman_protocol import (FRAME_HEADER, FRAME_TABLE, FRAME_BYTE_TABLE, FRAME_DATA, FRAME_END, FRAME_BLOCK_TRANSFER,
+                              FRAME_BLOCK, FRAME_TABLE_REF, FRAME_TABLE_QUERY, FRAME_TABLE_ACK,
+                              FRAME_TABLE_MISS, FrameReceiver, create_listening_socket, pack_frame,
+                              unpack_block_frame)
+from huffman_metrics import Metrics, timed_call
 
-def remove_padding(padded_encoded_text, padding_info_byte):
+# Konfiguracja serwera
+SERVER_HOST = '0.0.0.0'  # Adres serwera
+SERVER_PORT = 65432  # Port serwera
+DEFAULT_BACKLOG = 512  # Maksymalna kolejka połączeń oczekujących na akceptację
+OUTPUT_DIR = "."  # Katalog na pliki wyjściowe (po jednym na klienta)
+OUTPUT_FILENAME = "plik_odkodowany_{}_{}.txt"  # Wzorzec nazwy pliku wyjściowego (połączenie, transfer)
+OUTPUT_BINARY_FILENAME = "plik_odkodowany_{}_{}.bin"  # Jak wyżej, dla transferów w trybie bajtowym
+DECODE_TABLE_CACHE_SIZE = 32  # Liczba tablic dekodujących trzymanych w każdym procesie roboczym
+DEFAULT_PIPELINE_DEPTH = 4  # Liczba ramek jednego połączenia dekodowanych naraz w puli procesów
+DEFAULT_TABLE_REGISTRY_SIZE = 1024  # Liczba słowników pamiętanych przez serwer dla ramek FRAME_TABLE_REF/QUERY
+
+@functools.lru_cache(maxsize=DECODE_TABLE_CACHE_SIZE)
+def _decode_table(code_header, binary):
+    """
+    Buduje tablicę dekodującą raz na słownik w każdym procesie roboczym,
+    a nie dla każdej ramki transferu.
+    """
+    if binary:
+        return byte_decode_table_from_header(code_header)
+    return decode_table_from_header(code_header)
+
+def decode_frame(code_header, payload, binary=False):
     """
-    Usuwa padding (wypełnienie) z zakodowanego tekstu.
-    padding_info_byte zawiera informację o liczbie bitów paddingu dodanych na końcu.
+    Dekoduje jedną ramkę danych (tekst albo bytes w trybie bajtowym).
+    payload - dane ramki: bajt paddingu i zakodowane bajty (czytane przez memoryview, bez kopii).
+    Uruchamiana w procesie roboczym - dekodowanie obciąża CPU i nie może blokować pętli zdarzeń.
     """
-    padding_amount = int.from_bytes(padding_info_byte, byteorder='big')
-    if padding_amount == 0:
-        return padded_encoded_text
-    return padded_encoded_text[:-padding_amount]
+    padding_amount = payload[0]
+    encoded_data_bytes = memoryview(payload)[1:]
+    table = _decode_table(code_header, binary)
+    if binary:
+        return table.decode_bytes(encoded_data_bytes, padding_amount)
+    return table.decode(encoded_data_bytes, padding_amount)
 
-def decode_text(encoded_text, huffman_codes):
+def decode_block_frame(payload):
     """
-    Dekoduje tekst zakodowany metodą Huffmana.
-    encoded_text - tekst w formie ciągu bitów
-    huffman_codes - słownik kodów Huffmana
+    Dekoduje ramkę bloku - blok niesie własny słownik, więc nie zależy od innych ramek.
     """
-    # Tworzymy odwrócony słownik kodów (kod -> znak)
-    reverse_codes = {v: k for k, v in huffman_codes.items()}
-    if not reverse_codes:
-        return ""
+    code_header, padding_amount, encoded_bytes = unpack_block_frame(payload)
+    return decode_block(code_header, padding_amount, encoded_bytes)
 
-    current_code = ""
-    decoded_text = ""
+class TableRegistry:
+    """
+    Rejestr słowników odebranych przez serwer, kluczowany identyfikatorem (table_id nagłówka).
+    Trzyma max_tables ostatnio używanych słowników (LRU). Wpis to (typ ramki słownika, nagłówek).
+    """
+    def __init__(self, max_tables=DEFAULT_TABLE_REGISTRY_SIZE):
+        self.max_tables = max_tables
+        self._tables = collections.OrderedDict()
 
-    # Dekodujemy tekst bit po bicie
-    for bit in encoded_text:
-        current_code += bit
-        if current_code in reverse_codes:
-            character = reverse_codes[current_code]
-            decoded_text += character
-            current_code = ""
+    def __len__(self):
+        return len(self._tables)
 
-    return decoded_text
+    def register(self, frame_type, code_header):
+        identifier = table_id(code_header)
+        self._tables[identifier] = (frame_type, code_header)
+        self._tables.move_to_end(identifier)
+        while len(self._tables) > self.max_tables:
+            self._tables.popitem(last=False)
+        return identifier
 
-# Konfiguracja serwera
-server_address = ('0.0.0.0', 65432)  # Adres i port serwera
-output_filepath = "plik_odkodowany.txt"  # Ścieżka do pliku wyjściowego
-buffer_size = 4096  # Rozmiar bufora do odbierania danych
+    def get(self, identifier):
+        entry = self._tables.get(identifier)
+        if entry is not None:
+            self._tables.move_to_end(identifier)
+        return entry
 
-# Tworzenie i konfiguracja gniazda serwera
-with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as serv_socket:
-    serv_socket.bind(server_address)
-    serv_socket.listen(1)
-    print(f"Serwer nasłuchuje na {server_address}...")
+class HuffmanDecoderServer:
+    """
+    Serwer dekodujący obsługujący wielu klientów jednocześnie.
+    Odbiór danych odbywa się na strumieniach asyncio, a dekodowanie w puli procesów.
+    Połączenie niesie dowolnie wiele transferów (ramka słownika, ramki danych, ramka końca);
+    każda ramka danych jest dekodowana i zapisywana zaraz po odebraniu.
+    Transfer blokowy (ramka rozpoczęcia, ramki bloków, ramka końca) nie ma wspólnego słownika.
+    pipeline_depth - ile ramek jednego połączenia może być dekodowanych równolegle.
+    recv_buffer - rozmiar SO_RCVBUF gniazda nasłuchującego, dziedziczony przez gniazda klientów
+    (None - domyślny systemu).
+    Odebrane słowniki trafiają do rejestru (self.tables); transfer może je wskazać identyfikatorem.
+    Słowniki wysłane danym połączeniem są dla niego dostępne zawsze, także po usunięciu z rejestru.
+    Słownik z innego połączenia klient wskazuje ramką FRAME_TABLE_QUERY, na którą serwer odpowiada
+    FRAME_TABLE_ACK (transfer rozpoczęty) albo FRAME_TABLE_MISS (klient wysyła pełny nagłówek).
+    output_dir - katalog na pliki wyjściowe; None oznacza trzymanie wyników w pamięci
+    (self.results, klucz: (połączenie, transfer))
+    metrics - Metrics zbierające etapy "receive", "decode" (czas w procesie roboczym) i "write"
+    oraz histogramy opóźnień "connection_seconds" i "transfer_seconds".
+    """
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, backlog=DEFAULT_BACKLOG, workers=None,
+                 output_dir=OUTPUT_DIR, verbose=True, pipeline_depth=DEFAULT_PIPELINE_DEPTH, recv_buffer=None,
+                 max_tables=DEFAULT_TABLE_REGISTRY_SIZE, metrics=None):
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.workers = workers
+        self.output_dir = output_dir
+        self.verbose = verbose
+        self.pipeline_depth = pipeline_depth
+        self.recv_buffer = recv_buffer
+        self.tables = TableRegistry(max_tables)
+        self.results = {}
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.stats = {"connections": 0, "completed": 0, "transfers": 0, "table_refs": 0, "table_misses": 0,
+                      "errors": 0, "bytes_received": 0, "chars_decoded": 0}
+        self._executor = None
+        self._server = None
+        self._completed_event = None
 
-    # Akceptowanie połączenia od klienta
-    conn, addr = serv_socket.accept()
-    with conn:
-        print(f"Połączono z {addr}")
+    def log(self, message):
+        if self.verbose:
+            print(message)
 
+    async def start(self):
+        """
+        Uruchamia nasłuchiwanie. Port 0 oznacza port wybrany przez system (zapisywany w self.port).
+        """
+        # Procesy robocze uruchamiane przez spawn - przy fork dziedziczyłyby otwarte gniazda klientów
+        # i zamknięcie połączenia przez serwer nie docierałoby do klienta (i odwrotnie w benchmarku)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        self._completed_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        if self.recv_buffer is None:
+            self._server = await loop.create_server(
+                lambda: FrameReceiver(self.handle_client, self.pipeline_depth, self.metrics),
+                self.host, self.port, backlog=self.backlog)
+        else:
+            # Bufor ustawiany przed listen(), żeby wpłynął na skalowanie okna TCP przyjmowanych połączeń
+            self._server = await loop.create_server(
+                lambda: FrameReceiver(self.handle_client, self.pipeline_depth, self.metrics),
+                sock=create_listening_socket(self.host, self.port, self.recv_buffer), backlog=self.backlog)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.log(f"Serwer nasłuchuje na {(self.host, self.port)}...")
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown()
+        self.log("Serwer zakończył działanie.")
+
+    async def wait_for_completed(self, count):
+        """
+        Czeka, aż serwer zakończy obsługę (poprawnie lub z błędem) count połączeń.
+        """
+        while self.stats["completed"] + self.stats["errors"] < count:
+            await self._completed_event.wait()
+            self._completed_event.clear()
+
+    async def handle_client(self, receiver):
+        self.stats["connections"] += 1
+        connection_id = self.stats["connections"]
+        connection_started = time.perf_counter()
+        addr = receiver.transport.get_extra_info('peername')
+        self.log(f"Połączono z {addr} (połączenie {connection_id})")
+
+        loop = asyncio.get_running_loop()
+        transfer_id = 0
+        transfer_type = None  # Typ ramki, która rozpoczęła bieżący transfer (None - poza transferem)
+        code_header = None  # Nagłówek słownika bieżącego transferu
+        output = None  # Otwarty plik wyjściowy albo lista odkodowanych porcji
+        connection_tables = {}  # Słowniki wysłane tym połączeniem (identyfikator -> wpis rejestru)
+        pending = collections.deque()  # Dekodowane ramki - trwają, gdy odbieramy kolejne
         try:
-            # Odbieranie informacji o długości słownika kodowego
-            codes_len_bytes = conn.recv(4)
-            if not codes_len_bytes: raise ConnectionError("Klient rozłączył się przedwcześnie (długość słownika).")
-            codes_len = int.from_bytes(codes_len_bytes, byteorder='big')
-            print(f"Oczekiwanie na słownik o długości: {codes_len} bajtów")
-
-            # Odbieranie słownika kodowego
-            serialized_codes = b""
-            while len(serialized_codes) < codes_len:
-                chunk = conn.recv(min(buffer_size, codes_len - len(serialized_codes)))
-                if not chunk: raise ConnectionError("Klient rozłączył się podczas wysyłania słownika.")
-                serialized_codes += chunk
-            huffman_codes = pickle.loads(serialized_codes)
-            print("Odebrano i zdeserializowano słownik.")
-
-            # Odbieranie informacji o paddingu
-            padding_info_byte = conn.recv(1)
-            if not padding_info_byte: raise ConnectionError("Klient rozłączył się przed wysłaniem info o paddingu.")
-            print(f"Odebrano info o paddingu: {int.from_bytes(padding_info_byte, byteorder='big')} bitów")
-
-            # Odbieranie zakodowanych danych
-            encoded_data_bytes = bytearray()
-            print("Odbieranie danych...")
             while True:
-                chunk = conn.recv(buffer_size)
-                if not chunk:
+                frame = await receiver.read_frame()
+                if frame is None:
+                    if transfer_type is not None:
+                        raise ConnectionError("Klient rozłączył się w trakcie transferu.")
                     break
-                encoded_data_bytes.extend(chunk)
-            print(f"Odebrano {len(encoded_data_bytes)} bajtów danych.")
+                frame_type, payload = frame
+                self.stats["bytes_received"] += len(payload) + FRAME_HEADER.size
 
-            # Konwersja bajtów na ciąg bitów
-            encoded_bit_string = "".join(format(byte, "08b") for byte in encoded_data_bytes)
+                if frame_type in (FRAME_TABLE, FRAME_BYTE_TABLE, FRAME_BLOCK_TRANSFER, FRAME_TABLE_REF,
+                                  FRAME_TABLE_QUERY):
+                    if transfer_type is not None:
+                        raise ConnectionError("Nowy transfer przed zakończeniem poprzedniego.")
+                    code_header = bytes(payload)
+                    if frame_type in (FRAME_TABLE_REF, FRAME_TABLE_QUERY):
+                        entry = connection_tables.get(code_header) or self.tables.get(code_header)
+                        if frame_type == FRAME_TABLE_QUERY:
+                            receiver.transport.write(
+                                pack_frame(FRAME_TABLE_MISS if entry is None else FRAME_TABLE_ACK, code_header))
+                            if entry is None:
+                                # Transfer się nie zaczyna - klient wyśle zaraz pełny nagłówek słownika
+                                self.stats["table_misses"] += 1
+                                code_header = None
+                                continue
+                        elif entry is None:
+                            raise ConnectionError(f"Nieznany identyfikator słownika: {code_header.hex()}.")
+                        connection_tables[code_header] = entry
+                        frame_type, code_header = entry
+                        self.stats["table_refs"] += 1
+                    elif frame_type != FRAME_BLOCK_TRANSFER:
+                        connection_tables[self.tables.register(frame_type, code_header)] = (frame_type, code_header)
+                    transfer_id += 1
+                    transfer_started = time.perf_counter()
+                    transfer_type = frame_type
+                    output = self._open_output(connection_id, transfer_id, frame_type != FRAME_TABLE)
+                    continue
+                if transfer_type is None:
+                    raise ConnectionError("Ramka danych przed rozpoczęciem transferu.")
+                if frame_type != FRAME_END and (frame_type == FRAME_BLOCK) != (transfer_type == FRAME_BLOCK_TRANSFER):
+                    raise ConnectionError("Typ ramki danych nie pasuje do transferu.")
 
-            # Usunięcie paddingu
-            encoded_text_no_padding = remove_padding(encoded_bit_string, padding_info_byte)
+                # Wyniki zapisujemy w kolejności ramek dopiero, gdy w locie jest pipeline_depth ramek,
+                # dzięki czemu odbiór i dekodowanie kolejnych ramek się nakładają
+                if frame_type == FRAME_DATA:
+                    pending.append((loop.run_in_executor(self._executor, timed_call, decode_frame, code_header,
+                                                         payload, transfer_type == FRAME_BYTE_TABLE), len(payload)))
+                elif frame_type == FRAME_BLOCK:
+                    pending.append((loop.run_in_executor(self._executor, timed_call, decode_block_frame, payload),
+                                    len(payload)))
+                while pending and (len(pending) >= self.pipeline_depth or frame_type == FRAME_END):
+                    future, encoded_size = pending.popleft()
+                    text, wall_seconds, cpu_seconds = await future
+                    self.metrics.record("decode", wall_seconds, cpu_seconds, encoded_size, len(text))
+                    with self.metrics.stage("write", bytes_in=len(text), bytes_out=len(text)):
+                        self._write_output(output, text)
 
-            # Dekodowanie tekstu
-            decoded_text = decode_text(encoded_text_no_padding, huffman_codes)
+                if frame_type == FRAME_END:
+                    self._close_output(output, connection_id, transfer_id, transfer_type != FRAME_TABLE)
+                    transfer_type = code_header = output = None
+                    self.stats["transfers"] += 1
+                    self.metrics.observe("transfer_seconds", time.perf_counter() - transfer_started)
 
-            # Zapisanie odkodowanego tekstu do pliku
-            print(f"Zapisywanie odkodowanego tekstu do {output_filepath}...")
-            with open(output_filepath, 'w', encoding='utf-8') as f:
-                f.write(decoded_text)
-            print("Zapisano pomyślnie.")
+            self.stats["completed"] += 1
 
-        except pickle.UnpicklingError:
-            print("Błąd: Nie można zdeserializować słownika kodowego.")
+        except (ValueError, struct.error) as e:
+            # Nieprawidłowy nagłówek słownika albo dane, których nie da się nim odkodować
+            # (wyjątek z procesu roboczego przychodzi przez await na future dekodowania)
+            self.stats["errors"] += 1
+            print(f"Błąd: Nieprawidłowe dane transferu: {e} (połączenie {connection_id})")
         except ConnectionError as e:
-             print(f"Błąd połączenia: {e}")
+            self.stats["errors"] += 1
+            print(f"Błąd połączenia: {e} (połączenie {connection_id})")
         except Exception as e:
+            self.stats["errors"] += 1
             print(f"Wystąpił nieoczekiwany błąd: {e}")
         finally:
-            print("Zamykanie połączenia.")
+            for future, _ in pending:
+                future.cancel()
+            self.metrics.observe("connection_seconds", time.perf_counter() - connection_started)
+            if output is not None:
+                self._discard_output(output)
+            receiver.transport.close()
+            self._completed_event.set()
+
+    def _open_output(self, connection_id, transfer_id, binary):
+        if self.output_dir is None:
+            return []
+        if binary:
+            return open(os.path.join(self.output_dir, OUTPUT_BINARY_FILENAME.format(connection_id, transfer_id)), 'wb')
+        return open(os.path.join(self.output_dir, OUTPUT_FILENAME.format(connection_id, transfer_id)),
+                    'w', encoding='utf-8')
+
+    def _write_output(self, output, text):
+        self.stats["chars_decoded"] += len(text)
+        if isinstance(output, list):
+            output.append(text)
+        else:
+            output.write(text)
+
+    def _discard_output(self, output):
+        """
+        Porzuca wynik przerwanego transferu - częściowy plik nie może wyglądać na odkodowany.
+        """
+        if isinstance(output, list):
+            return
+        output.close()
+        os.remove(output.name)
+        self.log(f"Usunięto niepełny plik {output.name}.")
+
+    def _close_output(self, output, connection_id, transfer_id, binary):
+        if isinstance(output, list):
+            self.results[(connection_id, transfer_id)] = (b"" if binary else "").join(output)
+        else:
+            output.close()
+            self.log(f"Zapisano odkodowany tekst do {output.name}.")
+
+def run_server(host=SERVER_HOST, port=SERVER_PORT, backlog=DEFAULT_BACKLOG, workers=None, output_dir=OUTPUT_DIR,
+               pipeline_depth=DEFAULT_PIPELINE_DEPTH, recv_buffer=None, metrics_path=None):
+    """
+    Uruchamia serwer do przerwania (Ctrl+C).
+    metrics_path - plik, do którego po zakończeniu zapisywane są pomiary
+    (format Prometheusa dla rozszerzenia .prom, w przeciwnym razie JSON lines).
+    """
+    server = HuffmanDecoderServer(host, port, backlog, workers, output_dir, pipeline_depth=pipeline_depth,
+                                  recv_buffer=recv_buffer)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if metrics_path is not None:
+            server.metrics.dump(metrics_path)
+            print(f"Zapisano pomiary do {metrics_path}.")
+
+async def _send_payload(host, port, payload, semaphore):
+    async with semaphore:
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(payload)
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+async def _run_load(num_clients, concurrency, payload, workers, backlog):
+    server = HuffmanDecoderServer('127.0.0.1', 0, backlog, workers, output_dir=None, verbose=False)
+    await server.start()
+    try:
+        semaphore = asyncio.Semaphore(concurrency)
+        start = time.perf_counter()
+        await asyncio.gather(*(_send_payload('127.0.0.1', server.port, payload, semaphore)
+                               for _ in range(num_clients)))
+        await server.wait_for_completed(num_clients)
+        elapsed = time.perf_counter() - start
+    finally:
+        await server.close()
+    return server, elapsed
+
+def benchmark_server(num_clients=200, concurrency=200, text_size=64 * 1024, workers=None, backlog=DEFAULT_BACKLOG,
+                     chunk_chars=16 * 1024, sample_filepath="plik_do_zakodowania.txt"):
+    """
+    Lokalny generator obciążenia: num_clients klientów (do concurrency naraz) wysyła ten sam
+    zakodowany tekst o długości text_size znaków w ramkach po chunk_chars znaków.
+    Wypisuje połączenia/s oraz MB/s.
+    """
+    frequencies, _ = calculate_frequencies(sample_filepath)
+    text = "".join(random.choices(list(frequencies), weights=list(frequencies.values()), k=text_size))
+    huffman_codes = build_canonical_codes(calculate_text_frequencies(text))
+    frames = [pack_frame(FRAME_TABLE, serialize_code_lengths(huffman_codes))]
+    for start in range(0, len(text), chunk_chars):
+        byte_array, padding_amount = encode_text(text[start:start + chunk_chars], huffman_codes)
+        frames.append(pack_frame(FRAME_DATA, padding_amount.to_bytes(1, byteorder='big'), byte_array))
+    frames.append(pack_frame(FRAME_END))
+    payload = b"".join(frames)
+
+    server, elapsed = asyncio.run(_run_load(num_clients, concurrency, payload, workers, backlog))
+    assert server.stats["errors"] == 0 and all(result == text for result in server.results.values())
+
+    text_mb = num_clients * len(text.encode('utf-8')) / (1024 * 1024)
+    wire_mb = num_clients * len(payload) / (1024 * 1024)
+    print(f"Klientów: {num_clients}, równolegle: {concurrency}, czas: {elapsed:.2f} s")
+    print(f"  {num_clients / elapsed:.1f} połączeń/s, {wire_mb / elapsed:.2f} MB/s odebranych, "
+          f"{text_mb / elapsed:.2f} MB/s odkodowanych")
+    return num_clients / elapsed, wire_mb / elapsed
 
-print("Serwer zakończył działanie.")
+if __name__ == "__main__":
+    run_server()
@@ -1,158 +1,293 @@
-import heapq
+import os
 import socket
-import pickle
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from huffman_codec import (calculate_file_frequencies, iter_text_chunks, build_canonical_codes,
+                           serialize_code_lengths, calculate_file_byte_frequencies, iter_file_chunks,
+                           build_byte_codes, serialize_byte_code_lengths, encode_text, iter_encoded_blocks,
+                           read_block_index_file, codes_from_header, byte_codes_from_header, table_id,
+                           frequency_profile_key, encoded_size_bits, STREAM_CHUNK_CHARS, DEFAULT_BLOCK_SIZE,
+                           TABLE_ID_SIZE)
+from huffman_protocol import (FRAME_TABLE, FRAME_BYTE_TABLE, FRAME_BLOCK_TRANSFER, FRAME_BLOCK, FRAME_END,
+                              FRAME_TABLE_REF, FRAME_TABLE_QUERY, BLOCK_FRAME_HEADER, configure_socket, frame_header,
+                              recv_table_reply, send_frame, send_data_frame, send_block_frame)
+from huffman_metrics import Metrics
 
-class HuffmanNode:
+# Konfiguracja
+filepath = "plik_do_zakodowania.txt"
+server_address = ('localhost', 65432)
+TABLE_CACHE_DIR = ".huffman_cache"  # Domyślny katalog dyskowej pamięci podręcznej słowników
+DEFAULT_MAX_RATIO_LOSS = 0.02  # Dopuszczalny względny wzrost rozmiaru przy użyciu słownika z pamięci podręcznej
+
+class CodeTableCache:
     """
-    Klasa reprezentująca węzeł drzewa Huffmana.
-    char - znak (None dla węzłów wewnętrznych)
-    freq - częstotliwość występowania znaku
-    left, right - wskaźniki na lewe i prawe dziecko
+    Pamięć podręczna słowników kodowych kluczowana profilem częstotliwości (frequency_profile_key).
+    W pamięci trzyma max_entries ostatnio używanych słowników (LRU). Jeśli podano directory,
+    słowniki zapisywane są też na dysku (plik na klucz: typ ramki + nagłówek), a pliki
+    najdawniej używane (wg czasu modyfikacji) są usuwane ponad max_disk_entries.
+    Wpis to (typ ramki słownika, nagłówek).
     """
-    def __init__(self, char, freq):
-        self.char = char
-        self.freq = freq
-        self.left = None
-        self.right = None
+    def __init__(self, directory=None, max_entries=128, max_disk_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
 
-    def __lt__(self, other):
-        return self.freq < other.freq
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.tbl")
 
-def calculate_frequencies(filepath):
-    """
-    Oblicza częstotliwość występowania każdego znaku w pliku.
-    Zwraca słownik częstotliwości i oryginalny tekst.
-    """
-    frequencies = {}
-    with open(filepath, 'r', encoding='utf-8') as f:
-        text = f.read()
-    for char in text:
-        frequencies[char] = frequencies.get(char, 0) + 1
-    return frequencies, text
-
-def build_huffman_tree(frequencies):
-    """
-    Buduje drzewo Huffmana na podstawie częstotliwości znaków.
-    Używa kolejki priorytetowej do łączenia węzłów.
-    """
-    priority_queue = [HuffmanNode(char, freq) for char, freq in frequencies.items()]
-    heapq.heapify(priority_queue)
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
 
-    while len(priority_queue) > 1:
-        left = heapq.heappop(priority_queue)
-        right = heapq.heappop(priority_queue)
+    def get(self, key):
+        entry = self._memory.get(key)
+        if entry is None and self.directory is not None:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+            if len(data) < 2 or data[0] not in (FRAME_TABLE, FRAME_BYTE_TABLE):
+                return None  # Pusty albo uszkodzony plik traktujemy jak brak wpisu
+            entry = (data[0], data[1:])
+        if entry is None:
+            return None
+        self._remember(key, entry)
+        if self.directory is not None:
+            try:
+                os.utime(self._path(key))
+            except FileNotFoundError:
+                pass
+        return entry
 
-        merged = HuffmanNode(None, left.freq + right.freq)
-        merged.left = left
-        merged.right = right
-        heapq.heappush(priority_queue, merged)
+    def put(self, key, frame_type, code_header):
+        self._remember(key, (frame_type, code_header))
+        if self.directory is None:
+            return
+        with open(self._path(key), 'wb') as f:
+            f.write(bytes([frame_type]) + code_header)
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".tbl")]
+        if len(paths) > self.max_disk_entries:
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:len(paths) - self.max_disk_entries]:
+                os.remove(path)
 
-    return priority_queue[0]
+def select_code_table(frequencies, binary, cache=None, max_ratio_loss=DEFAULT_MAX_RATIO_LOSS, metrics=None):
+    """
+    Wybiera słownik dla transferu: z pamięci podręcznej albo nowy.
+    Słownik z pamięci podręcznej był już wysłany do serwera, więc transfer wskazuje go samym
+    identyfikatorem. Jest użyty, jeśli koduje wszystkie symbole, a rozmiar danych plus identyfikator
+    jest najwyżej o max_ratio_loss większy niż z nowym słownikiem i jego nagłówkiem.
+    W przeciwnym razie nowy słownik trafia do pamięci.
+    frequencies - słownik symbol -> liczność.
+    Zwraca (typ ramki słownika, nagłówek, kody, czy słownik pochodzi z pamięci podręcznej).
+    metrics - Metrics; mierzy etapy "tree" (budowa kodów) i "serialize" (nagłówek słownika).
+    """
+    metrics = metrics if metrics is not None else Metrics(enabled=False)
+    with metrics.stage("tree", bytes_in=len(frequencies)):
+        if binary:
+            frame_type = FRAME_BYTE_TABLE
+            counts = np.zeros(256, dtype=np.int64)
+            counts[list(frequencies)] = list(frequencies.values())
+            codes = build_byte_codes(counts)
+        else:
+            frame_type = FRAME_TABLE
+            codes = build_canonical_codes(frequencies)
+    with metrics.stage("serialize", bytes_in=len(frequencies)) as stage:
+        code_header = serialize_byte_code_lengths(codes) if binary else serialize_code_lengths(codes)
+        stage.bytes_out = len(code_header)
+    if cache is None:
+        return frame_type, code_header, codes, False
 
-def generate_codes(node, current_code="", codes={}):
+    key = frequency_profile_key(frequencies)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == frame_type:
+        cached_header = cached[1]
+        try:
+            cached_codes = byte_codes_from_header(cached_header) if binary else codes_from_header(cached_header)
+        except ValueError:
+            cached_codes = None  # Uszkodzony wpis - zostanie nadpisany nowym słownikiem
+        cached_bits = encoded_size_bits(frequencies, cached_codes) if cached_codes is not None else None
+        if cached_bits is not None:
+            fresh_total = encoded_size_bits(frequencies, codes) + 8 * len(code_header)
+            if cached_bits + 8 * TABLE_ID_SIZE <= fresh_total * (1 + max_ratio_loss):
+                return frame_type, cached_header, cached_codes, True
+    cache.put(key, frame_type, code_header)
+    return frame_type, code_header, codes, False
+
+def send_file(sock, filepath, chunk_chars=STREAM_CHUNK_CHARS, binary=False, cache=None, sent_tables=None,
+              metrics=None):
     """
-    Generuje kody Huffmana dla każdego znaku poprzez przejście po drzewie.
-    Zwraca słownik kodów (znak -> kod).
+    Wysyła jeden plik jako transfer: ramka ze słownikiem, ramki danych, ramka końca.
+    Słownik to kody kanoniczne, przesyłane jako nagłówek z samymi długościami kodów.
+    Plik czytany jest dwukrotnie porcjami po chunk_chars znaków (zliczanie, potem kodowanie),
+    więc pamięć nie zależy od rozmiaru pliku, a każda porcja jest wysyłana zaraz po zakodowaniu.
+    Na jednym połączeniu można wysłać wiele plików po kolei.
+    binary=True włącza tryb bajtowy: dowolny plik kodowany jest alfabetem 256 wartości bajtu,
+    a chunk_chars oznacza wtedy liczbę bajtów porcji.
+    cache - CodeTableCache; słownik wybiera wtedy select_code_table. Słownik z pamięci podręcznej,
+    którego to połączenie jeszcze nie wysłało, wskazywany jest ramką FRAME_TABLE_QUERY; jeśli serwer
+    go nie zna (FRAME_TABLE_MISS), wysyłany jest pełny nagłówek.
+    sent_tables - zbiór identyfikatorów słowników wysłanych już tym połączeniem (uzupełniany);
+    taki słownik wysyłany jest ponownie tylko jako identyfikator (ramka FRAME_TABLE_REF).
+    metrics - Metrics; mierzy etapy "frequencies", "tree", "serialize", "encode" i "network"
+    (w trybie tekstowym wejście etapów liczone jest w znakach, w bajtowym w bajtach).
+    Zwraca kody (słownik albo lista 256 kodów w trybie bajtowym) albo None dla pustego pliku.
     """
-    if node is None:
-        return
+    metrics = metrics if metrics is not None else Metrics(enabled=False)
+    with metrics.stage("frequencies") as stage:
+        if binary:
+            counts = calculate_file_byte_frequencies(filepath, chunk_chars)
+            frequencies = {int(symbol): int(counts[symbol]) for symbol in np.flatnonzero(counts)}
+            chunks = iter_file_chunks(filepath, chunk_chars)
+            stage.bytes_in = int(counts.sum())
+        else:
+            frequencies = calculate_file_frequencies(filepath, chunk_chars)
+            chunks = iter_text_chunks(filepath, chunk_chars)
+            stage.bytes_in = sum(frequencies.values())
+    if not frequencies:
+        return None
 
-    if node.char is not None:
-        codes[node.char] = current_code if current_code else "0"
-        return codes
+    frame_type, code_header, huffman_codes, from_cache = select_code_table(frequencies, binary, cache,
+                                                                           metrics=metrics)
+    identifier = table_id(code_header)
+    with metrics.stage("network") as stage:
+        if sent_tables is not None and identifier in sent_tables:
+            send_frame(sock, FRAME_TABLE_REF, identifier)
+            stage.bytes_out = len(identifier)
+        else:
+            stage.bytes_out = 0
+            if from_cache:
+                # Jedno okrążenie zapytania zamiast pełnego nagłówka, jeśli serwer pamięta słownik
+                send_frame(sock, FRAME_TABLE_QUERY, identifier)
+                stage.bytes_out = len(identifier)
+                known = recv_table_reply(sock, identifier)
+            else:
+                known = False
+            if not known:
+                send_frame(sock, frame_type, code_header)
+                stage.bytes_out += len(code_header)
+            if sent_tables is not None:
+                sent_tables.add(identifier)
+        stage.bytes_in = stage.bytes_out
 
-    codes.update(generate_codes(node.left, current_code + "0", codes.copy()))
-    codes.update(generate_codes(node.right, current_code + "1", codes.copy()))
-    return codes
+    for chunk in chunks:
+        with metrics.stage("encode", bytes_in=len(chunk)) as stage:
+            byte_array, padding_amount = encode_text(chunk, huffman_codes)
+            stage.bytes_out = len(byte_array)
+        with metrics.stage("network", bytes_in=len(byte_array) + 1, bytes_out=len(byte_array) + 1):
+            send_data_frame(sock, byte_array, padding_amount)
+    send_frame(sock, FRAME_END)
+    return huffman_codes
 
-def encode_text(text, codes):
+def send_file_blocks(sock, filepath, block_size=DEFAULT_BLOCK_SIZE, executor=None, metrics=None):
     """
-    Koduje tekst używając słownika kodów Huffmana.
+    Wysyła plik jako transfer blokowy: każdy blok block_size bajtów ma własny słownik,
+    więc dobrze kompresuje dane o zmiennej statystyce i wymaga tylko jednego przebiegu po pliku.
+    Z executor (np. ProcessPoolExecutor) bloki są kodowane równolegle i wysyłane w kolejności.
+    metrics - Metrics; etap "encode" to czas oczekiwania na kolejny zakodowany blok
+    (z executor praca procesów roboczych nie jest wliczana do czasu procesora), "network" - wysyłanie.
+    Zwraca liczbę wysłanych bloków.
     """
-    encoded_text = ""
-    for char in text:
-        encoded_text += codes[char]
-    return encoded_text
+    metrics = metrics if metrics is not None else Metrics(enabled=False)
+    send_frame(sock, FRAME_BLOCK_TRANSFER)
+    block_count = 0
+    file_size = os.path.getsize(filepath)
+    blocks = iter(iter_encoded_blocks(iter_file_chunks(filepath, block_size), executor))
+    while True:
+        with metrics.stage("encode") as stage:
+            block = next(blocks, None)
+            if block is not None:
+                code_header, encoded_bytes, padding_amount = block
+                stage.bytes_in = min(block_size, file_size - block_count * block_size)
+                stage.bytes_out = len(code_header) + len(encoded_bytes)
+        if block is None:
+            break
+        with metrics.stage("network", bytes_in=stage.bytes_out, bytes_out=stage.bytes_out):
+            send_block_frame(sock, code_header, encoded_bytes, padding_amount)
+        block_count += 1
+    send_frame(sock, FRAME_END)
+    return block_count
 
-def pad_encoded_text(encoded_text):
+def send_container_file(sock, container_path):
     """
-    Dodaje padding do zakodowanego tekstu, aby jego długość była wielokrotnością 8.
-    Zwraca tekst z paddingiem i informację o ilości dodanych bitów.
+    Wysyła kontener bloków zapisany na dysku (compress_file_blocks) jako transfer blokowy.
+    Nagłówek słownika i dane bloku leżą w kontenerze obok siebie, więc po nagłówku ramki
+    wysyłane są przez socket.sendfile prosto z pliku, bez kopiowania do pamięci procesu.
+    Zwraca liczbę wysłanych bloków.
     """
-    extra_padding = 8 - len(encoded_text) % 8
-    if extra_padding == 8:
-        extra_padding = 0
-
-    padded_encoded_text = encoded_text + '0' * extra_padding
-    padding_info = "{:08b}".format(extra_padding)
-    return padded_encoded_text, padding_info
+    index = read_block_index_file(container_path)
+    send_frame(sock, FRAME_BLOCK_TRANSFER)
+    with open(container_path, 'rb') as f:
+        for offset, _, header_length, encoded_length, padding_amount in index:
+            length = BLOCK_FRAME_HEADER.size + header_length + encoded_length
+            sock.sendall(frame_header(FRAME_BLOCK, length) + BLOCK_FRAME_HEADER.pack(padding_amount, header_length))
+            sock.sendfile(f, offset, header_length + encoded_length)
+    send_frame(sock, FRAME_END)
+    return len(index)
 
-def get_byte_array(padded_encoded_text):
+def run_client(filepaths=(filepath,), address=server_address, binary=False, block_size=None, cache_dir=None,
+               containers=False, workers=None, metrics_format=None, metrics_path=None, send_buffer=None):
     """
-    Konwertuje tekst z paddingiem na tablicę bajtów.
+    Wysyła pliki do serwera jednym połączeniem.
+    block_size - transfer blokowy o podanym rozmiarze bloku (bloki kodowane w workers procesach);
+    containers - pliki są już kontenerami bloków (compress_file_blocks) i idą przez sendfile;
+    cache_dir - katalog pamięci podręcznej słowników dla send_file.
+    metrics_format - "text", "json" albo "prometheus": po wysłaniu wypisuje pomiary etapów;
+    metrics_path - plik, do którego zapisać pomiary (Metrics.dump).
+    send_buffer - rozmiar SO_SNDBUF gniazda ustawiany przed połączeniem (None - domyślny systemu).
     """
-    if len(padded_encoded_text) % 8 != 0:
-        print("Error: Padded text length is not a multiple of 8")
-        exit()
+    metrics = Metrics(enabled=metrics_format is not None or metrics_path is not None)
+    cache = CodeTableCache(cache_dir) if cache_dir is not None else None
+    sent_tables = set()
+    executor = ProcessPoolExecutor(max_workers=workers) if block_size is not None and workers != 1 else None
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            configure_socket(s, send_buffer=send_buffer)
+            print(f"Łączenie z {address}...")
+            s.connect(address)
+            print("Połączono.")
 
-    b = bytearray()
-    for i in range(0, len(padded_encoded_text), 8):
-        byte = padded_encoded_text[i:i+8]
-        b.append(int(byte, 2))
-    return b
+            for path in filepaths:
+                print(f"Wysyłanie pliku {path}...")
+                if containers:
+                    print(f"Wysłano {send_container_file(s, path)} bloków.")
+                elif block_size is not None:
+                    print(f"Wysłano {send_file_blocks(s, path, block_size, executor, metrics)} bloków.")
+                else:
+                    huffman_codes = send_file(s, path, binary=binary, cache=cache, sent_tables=sent_tables,
+                                              metrics=metrics)
+                    if huffman_codes is None:
+                        print("Plik jest pusty.")
+                    elif not binary:
+                        # Wyświetlanie słownika kodowego
+                        print("Słownik kodowy Huffmana:")
+                        for char, code in sorted(huffman_codes.items()):
+                            print(f"  '{char}': {code}")
+                        print("-" * 20)
+            print("Wysyłanie zakończone.")
+        if metrics_format == "text":
+            print(metrics.summary())
+        elif metrics_format == "json":
+            print(metrics.to_json_lines(), end="")
+        elif metrics_format == "prometheus":
+            print(metrics.to_prometheus(), end="")
+        if metrics_path is not None:
+            metrics.dump(metrics_path)
 
-# Konfiguracja
-filepath = "plik_do_zakodowania.txt"
-server_address = ('localhost', 65432)
+    except ConnectionRefusedError:
+        print(f"Błąd: Nie można połączyć się z serwerem {address}. Czy serwer jest uruchomiony?")
+    except Exception as e:
+        print(f"Wystąpił błąd sieciowy: {e}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
-# Kodowanie tekstu
-frequencies, original_text = calculate_frequencies(filepath)
-if not frequencies:
-    print("Plik jest pusty.")
-    exit()
-
-# Budowanie drzewa Huffmana i generowanie kodów
-root = build_huffman_tree(frequencies)
-huffman_codes = generate_codes(root)
-
-# Wyświetlanie słownika kodowego
-print("Słownik kodowy Huffmana:")
-for char, code in sorted(huffman_codes.items()):
-     print(f"  '{char}': {code}")
-print("-" * 20)
-
-# Przygotowanie danych do wysłania
-encoded_text = encode_text(original_text, huffman_codes)
-padded_text, padding_info = pad_encoded_text(encoded_text)
-byte_array = get_byte_array(padded_text)
-serialized_codes = pickle.dumps(huffman_codes)
-
-# Wysyłanie danych do serwera
-try:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        print(f"Łączenie z {server_address}...")
-        s.connect(server_address)
-        print("Połączono.")
-
-        # Wysyłanie długości słownika
-        codes_len = len(serialized_codes).to_bytes(4, byteorder='big')
-        print(f"Wysyłanie długości słownika: {len(serialized_codes)} bajtów")
-        s.sendall(codes_len)
-
-        # Wysyłanie słownika kodowego
-        print("Wysyłanie słownika...")
-        s.sendall(serialized_codes)
-
-        # Wysyłanie informacji o paddingu
-        print(f"Wysyłanie informacji o paddingu: {int(padding_info, 2)} bitów")
-        s.sendall(int(padding_info, 2).to_bytes(1, byteorder='big'))
-
-        # Wysyłanie zakodowanych danych
-        print(f"Wysyłanie danych: {len(byte_array)} bajtów")
-        s.sendall(byte_array)
-        print("Wysyłanie zakończone.")
-
-except ConnectionRefusedError:
-    print(f"Błąd: Nie można połączyć się z serwerem {server_address}. Czy serwer jest uruchomiony?")
-except Exception as e:
-    print(f"Wystąpił błąd sieciowy: {e}")
+if __name__ == "__main__":
+    run_client()
@@ -0,0 +1,205 @@
+import bisect
+import json
+import time
+
+# Górne granice przedziałów histogramów opóźnień (w sekundach)
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class StageStats:
+    """
+    Zsumowane pomiary jednego etapu: liczba wywołań, czas rzeczywisty i procesora,
+    liczba jednostek na wejściu i bajtów na wyjściu.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "mb_per_s": self.bytes_in / self.wall_seconds / (1024 * 1024) if self.wall_seconds else 0.0,
+            "ratio": self.bytes_out / self.bytes_in if self.bytes_in else 0.0,
+        }
+
+class LatencyHistogram:
+    """
+    Histogram opóźnień o stałych przedziałach (jak histogram Prometheusa).
+    """
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """
+        Przybliżony kwantyl: górna granica przedziału, w którym wypada (inf ponad ostatnim).
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], self.counts)),
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+class _Stage:
+    """
+    Kontekst mierzący jeden przebieg etapu; bytes_in/bytes_out można ustawić wewnątrz bloku.
+    """
+    def __init__(self, metrics, name, bytes_in, bytes_out):
+        self.metrics = metrics
+        self.name = name
+        self.bytes_in = bytes_in
+        self.bytes_out = bytes_out
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.metrics.record(self.name, time.perf_counter() - self._wall, time.thread_time() - self._cpu,
+                            self.bytes_in, self.bytes_out)
+        return False
+
+class Metrics:
+    """
+    Zbiór pomiarów etapów przetwarzania i histogramów opóźnień.
+    Przy enabled=False wszystkie pomiary są pomijane, więc kod może mierzyć bezwarunkowo.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+        self.histograms = {}
+
+    def stage(self, name, bytes_in=0, bytes_out=0):
+        """
+        Zwraca kontekst mierzący czas rzeczywisty i procesora (bieżącego wątku) etapu name.
+        """
+        return _Stage(self, name, bytes_in, bytes_out)
+
+    def record(self, name, wall_seconds, cpu_seconds=0.0, bytes_in=0, bytes_out=0):
+        """
+        Dopisuje pomiar zmierzony gdzie indziej (np. w procesie roboczym).
+        """
+        if not self.enabled:
+            return
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        stats.calls += 1
+        stats.wall_seconds += wall_seconds
+        stats.cpu_seconds += cpu_seconds
+        stats.bytes_in += bytes_in
+        stats.bytes_out += bytes_out
+
+    def observe(self, name, seconds):
+        """
+        Dopisuje opóźnienie do histogramu name.
+        """
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def as_dict(self):
+        return {
+            "stages": {name: stats.as_dict() for name, stats in self.stages.items()},
+            "histograms": {name: histogram.as_dict() for name, histogram in self.histograms.items()},
+        }
+
+    def to_json_lines(self):
+        """
+        Jeden obiekt JSON na linię dla każdego etapu i histogramu.
+        """
+        lines = [json.dumps({"type": "stage", "name": name, **stats.as_dict()})
+                 for name, stats in self.stages.items()]
+        lines += [json.dumps({"type": "histogram", "name": name, **histogram.as_dict()})
+                  for name, histogram in self.histograms.items()]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def to_prometheus(self, prefix="huffman"):
+        """
+        Zrzut w formacie tekstowym Prometheusa (liczniki etapów i histogramy opóźnień).
+        """
+        lines = []
+        for metric, field, help_text in (("stage_calls_total", "calls", "Liczba przebiegów etapu"),
+                                         ("stage_wall_seconds_total", "wall_seconds", "Czas rzeczywisty etapu"),
+                                         ("stage_cpu_seconds_total", "cpu_seconds", "Czas procesora etapu"),
+                                         ("stage_bytes_in_total", "bytes_in", "Dane wejściowe etapu"),
+                                         ("stage_bytes_out_total", "bytes_out", "Dane wyjściowe etapu")):
+            if not self.stages:
+                break
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for name, stats in self.stages.items():
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {getattr(stats, field)}')
+        for name, histogram in self.histograms.items():
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            cumulative = 0
+            for bound, count in zip([str(bound) for bound in histogram.buckets] + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{prefix}_{name}_sum {histogram.sum}")
+            lines.append(f"{prefix}_{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def summary(self):
+        """
+        Czytelna tabela etapów i kwantyli opóźnień.
+        """
+        lines = [f"{'etap':>14} {'wywołań':>8} {'czas [s]':>9} {'CPU [s]':>9} {'wejście':>12} {'wyjście':>12} "
+                 f"{'MB/s':>8} {'stopień':>8}"]
+        for name, stats in self.stages.items():
+            values = stats.as_dict()
+            lines.append(f"{name:>14} {stats.calls:>8} {stats.wall_seconds:>9.3f} {stats.cpu_seconds:>9.3f} "
+                         f"{stats.bytes_in:>12} {stats.bytes_out:>12} {values['mb_per_s']:>8.2f} "
+                         f"{values['ratio']:>8.3f}")
+        for name, histogram in self.histograms.items():
+            lines.append(f"{name}: {histogram.count} pomiarów, p50 <= {histogram.quantile(0.5)} s, "
+                         f"p90 <= {histogram.quantile(0.9)} s, p99 <= {histogram.quantile(0.99)} s")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """
+        Zapisuje pomiary do pliku: format Prometheusa dla rozszerzenia .prom, w przeciwnym razie JSON lines.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus() if path.endswith(".prom") else self.to_json_lines())
+
+def timed_call(function, *args):
+    """
+    Wywołuje function(*args) i zwraca (wynik, czas rzeczywisty, czas procesora).
+    Przeznaczona do uruchamiania w procesie roboczym, gdzie czas procesora procesu to czas zadania.
+    """
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    result = function(*args)
+    return result, time.perf_counter() - wall, time.process_time() - cpu
@@ -0,0 +1,291 @@
+import asyncio
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+# Nagłówek ramki: typ ramki (1 bajt) + długość danych ramki (4 bajty, big-endian)
+FRAME_HEADER = struct.Struct('>BI')
+# Ramka ze słownikiem kodowym - rozpoczyna nowy transfer
+FRAME_TABLE = 1
+# Ramka z danymi: 1 bajt paddingu + zakodowane bajty jednej porcji tekstu
+FRAME_DATA = 2
+# Pusta ramka kończąca transfer
+FRAME_END = 3
+# Ramka ze słownikiem trybu bajtowego - rozpoczyna transfer danych binarnych
+FRAME_BYTE_TABLE = 4
+# Pusta ramka rozpoczynająca transfer blokowy (dane binarne, osobny słownik w każdym bloku)
+FRAME_BLOCK_TRANSFER = 5
+# Ramka z jednym samodzielnym blokiem: BLOCK_FRAME_HEADER + nagłówek słownika + zakodowane dane
+FRAME_BLOCK = 6
+# Ramka rozpoczynająca transfer słownikiem wysłanym wcześniej - niesie tylko jego identyfikator
+FRAME_TABLE_REF = 7
+# Jak FRAME_TABLE_REF, ale dla słownika, którego serwer może nie znać (wysłanego innym połączeniem);
+# serwer odpowiada ramką FRAME_TABLE_ACK albo FRAME_TABLE_MISS z tym samym identyfikatorem
+FRAME_TABLE_QUERY = 8
+# Wszystkie znane typy ramek wysyłanych przez klienta
+FRAME_TYPES = (FRAME_TABLE, FRAME_DATA, FRAME_END, FRAME_BYTE_TABLE, FRAME_BLOCK_TRANSFER, FRAME_BLOCK,
+               FRAME_TABLE_REF, FRAME_TABLE_QUERY)
+# Odpowiedź serwera na FRAME_TABLE_QUERY: słownik znany, transfer rozpoczęty
+FRAME_TABLE_ACK = 9
+# Odpowiedź serwera na FRAME_TABLE_QUERY: słownik nieznany, klient rozpoczyna transfer pełnym nagłówkiem
+FRAME_TABLE_MISS = 10
+# Nagłówek ramki bloku: padding (1 bajt) + długość nagłówka słownika (2 bajty)
+BLOCK_FRAME_HEADER = struct.Struct('>BH')
+# Maksymalny rozmiar danych jednej ramki - ogranicza pamięć po stronie serwera
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+# Maksymalna liczba odebranych, nieprzetworzonych ramek - powyżej odbiór jest wstrzymywany
+MAX_QUEUED_FRAMES = 4
+
+def frame_header(frame_type, length):
+    """
+    Zwraca nagłówek ramki o podanym typie i długości danych.
+    """
+    return FRAME_HEADER.pack(frame_type, length)
+
+def pack_frame(frame_type, *parts):
+    """
+    Składa całą ramkę (nagłówek + dane) w jeden obiekt bytes.
+    """
+    return frame_header(frame_type, sum(len(part) for part in parts)) + b"".join(parts)
+
+def send_frame(sock, frame_type, *parts):
+    """
+    Wysyła ramkę przez gniazdo bez łączenia części danych w jeden bufor.
+    """
+    sock.sendall(frame_header(frame_type, sum(len(part) for part in parts)))
+    for part in parts:
+        sock.sendall(part)
+
+def send_data_frame(sock, byte_array, padding_amount):
+    """
+    Wysyła ramkę z danymi jednej zakodowanej porcji tekstu.
+    """
+    send_frame(sock, FRAME_DATA, padding_amount.to_bytes(1, byteorder='big'), byte_array)
+
+def send_block_frame(sock, code_header, encoded_bytes, padding_amount):
+    """
+    Wysyła ramkę z jednym blokiem zakodowanym własnym słownikiem.
+    """
+    send_frame(sock, FRAME_BLOCK, BLOCK_FRAME_HEADER.pack(padding_amount, len(code_header)), code_header, encoded_bytes)
+
+def unpack_block_frame(payload):
+    """
+    Rozdziela dane ramki bloku na (nagłówek słownika, padding, zakodowane bajty).
+    """
+    padding_amount, header_length = BLOCK_FRAME_HEADER.unpack_from(payload, 0)
+    start = BLOCK_FRAME_HEADER.size
+    return payload[start:start + header_length], padding_amount, payload[start + header_length:]
+
+def configure_socket(sock, send_buffer=None, recv_buffer=None):
+    """
+    Ustawia rozmiary buforów jądra gniazda (SO_SNDBUF/SO_RCVBUF); None zostawia wartość domyślną.
+    Skalowanie okna TCP ustalane jest przy nawiązywaniu połączenia, więc gniazdo trzeba
+    skonfigurować przed connect(), a po stronie serwera - gniazdo nasłuchujące przed listen().
+    """
+    if send_buffer is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, send_buffer)
+    if recv_buffer is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, recv_buffer)
+
+def create_listening_socket(host, port, recv_buffer=None):
+    """
+    Tworzy związane z adresem gniazdo TCP z ustawionym SO_RCVBUF, jeszcze bez listen().
+    Przyjęte połączenia dziedziczą bufor po gnieździe nasłuchującym; listen() wywołuje
+    wywołujący (albo asyncio przy loop.create_server(sock=...)).
+    """
+    family, sock_type, proto, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM,
+                                                              flags=socket.AI_PASSIVE)[0]
+    sock = socket.socket(family, sock_type, proto)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        configure_socket(sock, recv_buffer=recv_buffer)
+        sock.bind(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def recv_exactly_into(sock, buffer):
+    """
+    Wypełnia cały bufor danymi z gniazda przez recv_into na kolejnych wycinkach memoryview.
+    """
+    view = memoryview(buffer)
+    filled = 0
+    while filled < len(view):
+        received = sock.recv_into(view[filled:])
+        if not received:
+            raise ConnectionError("Połączenie zamknięte w trakcie ramki.")
+        filled += received
+
+def recv_table_reply(sock, identifier):
+    """
+    Odbiera odpowiedź serwera na FRAME_TABLE_QUERY. Zwraca True, jeśli serwer zna słownik.
+    """
+    buffer = bytearray(FRAME_HEADER.size + len(identifier))
+    recv_exactly_into(sock, buffer)
+    frame_type, length = FRAME_HEADER.unpack_from(buffer, 0)
+    if (frame_type not in (FRAME_TABLE_ACK, FRAME_TABLE_MISS) or length != len(identifier)
+            or buffer[FRAME_HEADER.size:] != identifier):
+        raise ConnectionError("Nieprawidłowa odpowiedź serwera na zapytanie o słownik.")
+    return frame_type == FRAME_TABLE_ACK
+
+def parse_frame_header(header):
+    """
+    Rozpakowuje i sprawdza nagłówek ramki. Zwraca (typ ramki, długość danych).
+    """
+    frame_type, length = FRAME_HEADER.unpack(header)
+    if frame_type not in FRAME_TYPES:
+        raise ConnectionError(f"Nieznany typ ramki: {frame_type}.")
+    if length > MAX_FRAME_SIZE:
+        raise ConnectionError(f"Ramka za duża: {length} bajtów (limit {MAX_FRAME_SIZE}).")
+    return frame_type, length
+
+class FrameReceiver(asyncio.BufferedProtocol):
+    """
+    Protokół asyncio odbierający ramki bez kopiowania: transport wykonuje recv_into
+    bezpośrednio do nagłówka, a potem do bufora danych przydzielonego na zapowiedzianą długość.
+    Gotowe ramki trafiają do kolejki; gdy czeka w niej max_queued ramek, odbiór jest wstrzymywany.
+    on_connect - korutyna wywoływana z odbiornikiem po nawiązaniu połączenia.
+    metrics - Metrics; etap "receive" to czas od pierwszego do ostatniego bajtu każdej ramki.
+    """
+    def __init__(self, on_connect=None, max_queued=MAX_QUEUED_FRAMES, metrics=None):
+        self.on_connect = on_connect
+        self.max_queued = max_queued
+        self.metrics = metrics
+        self._frame_started = None
+        self.transport = None
+        self.task = None
+        self._frames = asyncio.Queue()
+        self._paused = False
+        self._start_header()
+
+    def _start_header(self):
+        self._frame_type = None
+        self._buffer = bytearray(FRAME_HEADER.size)
+        self._view = memoryview(self._buffer)
+        self._filled = 0
+
+    def _emit(self, item):
+        if self.metrics is not None and isinstance(item, tuple):
+            size = FRAME_HEADER.size + len(item[1])
+            self.metrics.record("receive", time.perf_counter() - self._frame_started, bytes_in=size, bytes_out=size)
+        self._frames.put_nowait(item)
+        if not self._paused and self._frames.qsize() >= self.max_queued and self.transport is not None:
+            self._paused = True
+            self.transport.pause_reading()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        if self.on_connect is not None:
+            self.task = asyncio.get_running_loop().create_task(self.on_connect(self))
+
+    def get_buffer(self, sizehint):
+        return self._view[self._filled:]
+
+    def buffer_updated(self, nbytes):
+        if self._frame_type is None and not self._filled:
+            self._frame_started = time.perf_counter()
+        self._filled += nbytes
+        if self._filled < len(self._buffer):
+            return
+        if self._frame_type is not None:
+            self._emit((self._frame_type, self._buffer))
+            self._start_header()
+            return
+        try:
+            frame_type, length = parse_frame_header(self._buffer)
+        except ConnectionError as e:
+            self._emit(e)
+            self.transport.close()
+            return
+        if length == 0:
+            self._emit((frame_type, bytearray()))
+            self._start_header()
+            return
+        self._frame_type = frame_type
+        self._buffer = bytearray(length)
+        self._view = memoryview(self._buffer)
+        self._filled = 0
+
+    def eof_received(self):
+        if self._frame_type is not None or self._filled:
+            self._emit(ConnectionError("Połączenie zamknięte w trakcie ramki."))
+        else:
+            self._emit(None)
+        return False
+
+    def connection_lost(self, exc):
+        if exc is not None:
+            self._emit(ConnectionError(str(exc)))
+        self._emit(None)
+
+    async def read_frame(self):
+        """
+        Zwraca kolejną ramkę (typ, dane jako bytearray) albo None po zamknięciu połączenia.
+        """
+        item = await self._frames.get()
+        if self._paused and self._frames.qsize() < self.max_queued:
+            self._paused = False
+            self.transport.resume_reading()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+def _send_test_file(port, filepath, zero_copy, send_buffer):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        configure_socket(sock, send_buffer=send_buffer)
+        sock.connect(('127.0.0.1', port))
+        with open(filepath, 'rb') as f:
+            if zero_copy:
+                sock.sendfile(f)
+            else:
+                sock.sendall(f.read())
+
+def _loopback_transfer(filepath, size, zero_copy, buffer_size, socket_buffer):
+    with create_listening_socket('127.0.0.1', 0, socket_buffer) as listener:
+        listener.listen()
+        sender = threading.Thread(target=_send_test_file,
+                                  args=(listener.getsockname()[1], filepath, zero_copy, socket_buffer))
+        start = time.perf_counter()
+        sender.start()
+        conn, _ = listener.accept()
+        with conn:
+            if zero_copy:
+                received = bytearray(size)
+                recv_exactly_into(conn, received)
+            else:
+                received = bytearray()
+                while len(received) < size:
+                    chunk = conn.recv(buffer_size)
+                    if not chunk:
+                        break
+                    received.extend(chunk)
+        sender.join()
+        elapsed = time.perf_counter() - start
+    assert len(received) == size
+    return elapsed
+
+def benchmark_socket_io(sizes_mb=(1, 100, 1024), buffer_size=4096, socket_buffer=None, directory=None):
+    """
+    Mierzy przepustowość przesyłu pliku przez pętlę zwrotną:
+    przed - odczyt pliku do pamięci + sendall, odbiór recv(buffer_size) + bytearray.extend,
+    po - socket.sendfile prosto z pliku, odbiór recv_into do bufora o znanym rozmiarze.
+    socket_buffer ustawia SO_SNDBUF/SO_RCVBUF po obu stronach (None - domyślne systemu).
+    """
+    results = []
+    for size_mb in sizes_mb:
+        size = size_mb * 1024 * 1024
+        with tempfile.NamedTemporaryFile(dir=directory) as f:
+            pattern = os.urandom(1024 * 1024)
+            for _ in range(size_mb):
+                f.write(pattern)
+            f.flush()
+            timings = [_loopback_transfer(f.name, size, zero_copy, buffer_size, socket_buffer)
+                       for zero_copy in (False, True)]
+        print(f"{size_mb:5d} MB: recv+extend {size_mb / timings[0]:8.1f} MB/s, "
+              f"sendfile+recv_into {size_mb / timings[1]:8.1f} MB/s ({timings[0] / timings[1]:.1f}x)")
+        results.append((size_mb, size_mb / timings[0], size_mb / timings[1]))
+    return results
@@ -1,96 +1,669 @@
-import soundcard as sc
+import os
+import struct
+import threading
+import time
+import tracemalloc
 import numpy as np
-from scipy.io.wavfile import write, read
 
 # Dostępne poziomy kwantyzacji (głębia bitowa)
-WSPIERANE_GLEBIE_BITOWE = [8, 16, 32]
+WSPIERANE_GLEBIE_BITOWE = [8, 16, 24, 32]
+# Typ próbki w pamięci dla każdej głębi (24-bit trzymane w int32, w pliku pakowane do 3 bajtów)
+TYPY_PROBEK = {8: np.uint8, 16: np.int16, 24: np.int32, 32: np.int32}
+# Współczynnik skalowania [-1.0, 1.0] -> zakres całkowity (8-bit: po przesunięciu do [0, 2])
+SKALE_KWANTYZACJI = {8: 127.5, 16: 32767, 24: 2 ** 23 - 1, 32: 2 ** 31 - 1}
+# Zakres wartości próbek (nasycenie przy kwantyzacji)
+ZAKRESY_PROBEK = {8: (0, 255), 16: (-2 ** 15, 2 ** 15 - 1), 24: (-2 ** 23, 2 ** 23 - 1), 32: (-2 ** 31, 2 ** 31 - 1)}
 # Domyślna liczba kanałów (1 dla mono, 2 dla stereo)
 KANALY = 1
+# Liczba ramek (próbek na kanał) w jednym bloku nagrywania i odtwarzania
+ROZMIAR_BLOKU = 4096
+# Liczba bloków w buforze pierścieniowym między wątkiem nagrywającym a zapisującym
+GLEBOKOSC_BUFORA = 64
+# Nagłówek WAV (RIFF + fmt PCM + początek chunku data) - rozmiary uzupełniane przy zamknięciu pliku
+NAGLOWEK_WAV = struct.Struct('<4sI4s4sIHHIIHH4sI')
 
 
-def nagrywaj_i_zapisz_audio(nazwa_pliku, czas_trwania_s, czestotliwosc_probkowania, glebia_bitowa, kanaly=KANALY):
+def domyslny_mikrofon():
+    # soundcard importowany dopiero tutaj - bez serwera dźwięku (np. w testach) import się nie udaje
+    import soundcard as sc
+    return sc.default_microphone()
+
+
+class Kwantyzator:
+    """
+    Kwantyzacja bloków float z zakresu [-1.0, 1.0] do typu całkowitego pliku WAV
+    na buforach przydzielonych raz (ufunc z out=), bez tablic pośrednich przy każdym bloku.
+    Odwzorowania są te same co wcześniej przy nagrywaniu (skalowanie i obcięcie części ułamkowej),
+    ale wartości spoza zakresu są nasycane zamiast się zawijać.
+    dither=True dodaje przed kwantyzacją szum TPDF (suma dwóch rozkładów jednostajnych, +-1 LSB)
+    z szybkiego generatora SFC64 i zaokrągla do najbliższej wartości - przy obcinaniu części ułamkowej
+    dither nie usuwałby martwej strefy wokół zera.
+    typ_float - typ bufora roboczego; domyślnie float64 dla 32 bitów (float32 ma 24 bity mantysy,
+    więc gubiłby młodsze bity próbek i nasycał +1.0 niesymetrycznie), a float32 dla pozostałych głębi.
+    """
+    def __init__(self, glebia_bitowa, rozmiar_bloku=ROZMIAR_BLOKU, kanaly=KANALY, dither=False, rng=None,
+                 typ_float=None):
+        if typ_float is None:
+            typ_float = np.float64 if glebia_bitowa == 32 else np.float32
+        self.glebia_bitowa = glebia_bitowa
+        self.skala = SKALE_KWANTYZACJI[glebia_bitowa]
+        self.dane = np.empty((rozmiar_bloku, kanaly), dtype=TYPY_PROBEK[glebia_bitowa])
+        self.bufor = np.empty((rozmiar_bloku, kanaly), dtype=typ_float)
+        self.bufor_ditheru = np.empty((rozmiar_bloku, kanaly), dtype=typ_float) if dither else None
+        self.rng = rng if rng is not None else np.random.Generator(np.random.SFC64())
+        dolna, gorna = ZAKRESY_PROBEK[glebia_bitowa]
+        # Granice w typie bufora: 2**31 - 1 nie ma dokładnej reprezentacji we float32 i zaokrągla się w górę
+        self.dolna = typ_float(dolna)
+        self.gorna = typ_float(gorna)
+        if int(self.gorna) > gorna:
+            self.gorna = np.nextafter(self.gorna, typ_float(0))
+
+    def kwantyzuj(self, blok_float):
+        """
+        Zwraca widok na bufor wyjściowy (ważny do następnego wywołania) o kształcie (ramki, kanały).
+        """
+        ramki = len(blok_float)
+        blok_float = blok_float.reshape(ramki, -1)
+        bufor = self.bufor[:ramki]
+        # dtype=bufor.dtype - pierwsza operacja liczona w typie bufora, a nie wejścia (float32 przy 32 bitach)
+        if self.glebia_bitowa == 8:
+            # (blok_float + 1.0) * 127.5 => mapuje [-1,1] na [0,255]
+            np.add(blok_float, 1.0, out=bufor, dtype=bufor.dtype)
+            np.multiply(bufor, self.skala, out=bufor)
+        else:
+            np.multiply(blok_float, self.skala, out=bufor, dtype=bufor.dtype)
+        if self.bufor_ditheru is not None:
+            dither = self.bufor_ditheru[:ramki]
+            self.rng.random(out=dither, dtype=dither.dtype)
+            np.add(bufor, dither, out=bufor)
+            self.rng.random(out=dither, dtype=dither.dtype)
+            np.subtract(bufor, dither, out=bufor)
+            np.rint(bufor, out=bufor)
+        np.clip(bufor, self.dolna, self.gorna, out=bufor)
+        dane = self.dane[:ramki]
+        np.copyto(dane, bufor, casting='unsafe')
+        return dane
+
+
+def rozpakuj_24(blok_bajtow, bufor_int):
+    """
+    Rozpakowuje próbki 24-bit (tablica uint8 o ostatnim wymiarze 3, little-endian) do bufora int32
+    z rozszerzeniem znaku. Zwraca bufor_int.
+    """
+    np.copyto(bufor_int, blok_bajtow[..., 2].view(np.int8))
+    np.left_shift(bufor_int, 8, out=bufor_int)
+    np.bitwise_or(bufor_int, blok_bajtow[..., 1], out=bufor_int)
+    np.left_shift(bufor_int, 8, out=bufor_int)
+    np.bitwise_or(bufor_int, blok_bajtow[..., 0], out=bufor_int)
+    return bufor_int
+
+
+def otworz_wav(nazwa_pliku):
+    """
+    Mapuje dane pliku WAV (PCM 8/16/24/32-bit albo float32) do pamięci bez wczytywania.
+    Zwraca (częstotliwość próbkowania, głębia bitowa, dane): dane mają kształt (ramki, kanały),
+    a dla 24 bitów (ramki, kanały, 3) bajtów do rozpakowania przez rozpakuj_24.
+    """
+    with open(nazwa_pliku, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f"Plik {nazwa_pliku} nie jest plikiem WAV.")
+        format_audio = None
+        while True:
+            naglowek_chunku = f.read(8)
+            if len(naglowek_chunku) < 8:
+                raise ValueError(f"Brak danych audio w pliku {nazwa_pliku}.")
+            identyfikator, rozmiar = struct.unpack('<4sI', naglowek_chunku)
+            if identyfikator == b'fmt ':
+                fmt = f.read(rozmiar + rozmiar % 2)
+                format_audio, kanaly, czestotliwosc_probkowania = struct.unpack_from('<HHI', fmt)
+                glebia_bitowa = struct.unpack_from('<H', fmt, 14)[0]
+                if format_audio == 0xFFFE:
+                    # WAVE_FORMAT_EXTENSIBLE - właściwy format na początku GUID podformatu
+                    format_audio = struct.unpack_from('<H', fmt, 24)[0]
+            elif identyfikator == b'data':
+                poczatek_danych = f.tell()
+                break
+            else:
+                f.seek(rozmiar + rozmiar % 2, 1)
+    if format_audio is None:
+        raise ValueError(f"Brak opisu formatu w pliku {nazwa_pliku}.")
+    if format_audio == 3 and glebia_bitowa == 32:
+        typ = np.dtype('<f4')
+    elif format_audio == 1 and glebia_bitowa in TYPY_PROBEK:
+        typ = np.dtype(TYPY_PROBEK[glebia_bitowa]).newbyteorder('<') if glebia_bitowa != 24 else np.dtype(np.uint8)
+    else:
+        raise ValueError(f"Nieobsługiwany format WAV: typ {format_audio}, {glebia_bitowa} bitów.")
+    bajty_ramki = kanaly * glebia_bitowa // 8
+    ramki = min(rozmiar, os.path.getsize(nazwa_pliku) - poczatek_danych) // bajty_ramki
+    ksztalt = (ramki, kanaly, 3) if glebia_bitowa == 24 else (ramki, kanaly)
+    if ramki == 0:
+        return czestotliwosc_probkowania, glebia_bitowa, np.empty(ksztalt, dtype=typ)
+    return czestotliwosc_probkowania, glebia_bitowa, np.memmap(nazwa_pliku, dtype=typ, mode='r',
+                                                               offset=poczatek_danych, shape=ksztalt)
+
+
+class StrumieniowyZapisWav:
+    """
+    Plik WAV (PCM) zapisywany przyrostowo blokami. Nagłówek zapisywany jest od razu
+    z zerowymi rozmiarami i poprawiany przy zamknięciu, więc dane trafiają na dysk w trakcie nagrywania.
+    """
+    def __init__(self, nazwa_pliku, czestotliwosc_probkowania, glebia_bitowa, kanaly=KANALY):
+        self.czestotliwosc_probkowania = czestotliwosc_probkowania
+        self.glebia_bitowa = glebia_bitowa
+        self.kanaly = kanaly
+        self.bajty_danych = 0
+        self._bufor_24 = np.empty((0, kanaly, 3), dtype=np.uint8)
+        self.plik = open(nazwa_pliku, 'wb')
+        self._zapisz_naglowek()
+
+    def _zapisz_naglowek(self):
+        bajty_probki = self.glebia_bitowa // 8
+        # Rozmiar chunku RIFF obejmuje bajt wyrównania danych o nieparzystej długości, rozmiar chunku data - nie
+        rozmiar_riff = 36 + self.bajty_danych + self.bajty_danych % 2
+        self.plik.write(NAGLOWEK_WAV.pack(b'RIFF', rozmiar_riff, b'WAVE', b'fmt ', 16, 1, self.kanaly,
+                                          self.czestotliwosc_probkowania,
+                                          self.czestotliwosc_probkowania * self.kanaly * bajty_probki,
+                                          self.kanaly * bajty_probki, self.glebia_bitowa, b'data', self.bajty_danych))
+
+    def zapisz(self, dane_skwantyzowane):
+        if self.glebia_bitowa == 24:
+            # Pakowanie int32 do 3 młodszych bajtów (little-endian) we wielokrotnie używanym buforze
+            ramki = len(dane_skwantyzowane)
+            if len(self._bufor_24) < ramki:
+                self._bufor_24 = np.empty((ramki, self.kanaly, 3), dtype=np.uint8)
+            dane = self._bufor_24[:ramki]
+            np.copyto(dane, np.ascontiguousarray(dane_skwantyzowane, dtype='<i4').view(np.uint8)
+                      .reshape(ramki, self.kanaly, 4)[..., :3])
+        else:
+            dane = np.ascontiguousarray(dane_skwantyzowane)
+        self.plik.write(dane.data)
+        self.bajty_danych += dane.nbytes
+
+    def zamknij(self):
+        if self.plik.closed:
+            return
+        if self.bajty_danych % 2:
+            # Chunk RIFF musi mieć parzystą długość
+            self.plik.write(b'\x00')
+        self.plik.seek(0)
+        self._zapisz_naglowek()
+        self.plik.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, wyjatek, slad):
+        self.zamknij()
+        return False
+
+
+class BuforPierscieniowy:
+    """
+    Ograniczony bufor pierścieniowy bloków float32 przydzielony raz na początku.
+    Wątek nagrywający kopiuje blok do wolnego miejsca (wloz), wątek zapisujący czyta go
+    w miejscu (wyjmij) i oddaje po użyciu (zwolnij). Pełny bufor wstrzymuje nagrywanie
+    zamiast gubić próbki; każde takie oczekiwanie liczone jest w przepelnienia.
+    Z czekaj=False wloz odrzuca blok przy pełnym buforze, a wyjmij zwraca None przy pustym
+    (tryb czasu rzeczywistego). Każdy blok niesie znacznik czasu, dostępny po wyjmij w znacznik_odczytu.
+    """
+    def __init__(self, liczba_blokow, rozmiar_bloku, kanaly=KANALY):
+        self.bloki = np.empty((liczba_blokow, rozmiar_bloku, kanaly), dtype=np.float32)
+        self.dlugosci = [0] * liczba_blokow
+        self.znaczniki = [0.0] * liczba_blokow
+        self.znacznik_odczytu = 0.0
+        self.zajete = 0
+        self.przepelnienia = 0
+        self._zapis = 0
+        self._odczyt = 0
+        self._zamkniety = False
+        self._warunek = threading.Condition()
+
+    def wloz(self, blok, znacznik=0.0, czekaj=True):
+        """
+        Kopiuje blok do bufora. Zwraca False, jeśli bufor był pełny, a czekaj=False (blok odrzucony).
+        """
+        with self._warunek:
+            if self.zajete == len(self.bloki):
+                self.przepelnienia += 1
+                if not czekaj:
+                    return False
+                self._warunek.wait_for(lambda: self.zajete < len(self.bloki))
+            ramki = len(blok)
+            self.bloki[self._zapis, :ramki] = blok.reshape(ramki, -1)
+            self.dlugosci[self._zapis] = ramki
+            self.znaczniki[self._zapis] = znacznik
+            self._zapis = (self._zapis + 1) % len(self.bloki)
+            self.zajete += 1
+            self._warunek.notify_all()
+            return True
+
+    def wyjmij(self, czekaj=True):
+        """
+        Zwraca widok na najstarszy blok albo None po zamknięciu i opróżnieniu bufora
+        (z czekaj=False także wtedy, gdy bufor jest chwilowo pusty).
+        """
+        with self._warunek:
+            if czekaj:
+                self._warunek.wait_for(lambda: self.zajete or self._zamkniety)
+            if not self.zajete:
+                return None
+            self.znacznik_odczytu = self.znaczniki[self._odczyt]
+            return self.bloki[self._odczyt, :self.dlugosci[self._odczyt]]
+
+    @property
+    def zamkniety(self):
+        return self._zamkniety
+
+    def zwolnij(self):
+        with self._warunek:
+            self._odczyt = (self._odczyt + 1) % len(self.bloki)
+            self.zajete -= 1
+            self._warunek.notify_all()
+
+    def zamknij(self):
+        with self._warunek:
+            self._zamkniety = True
+            self._warunek.notify_all()
+
+
+def _zapisuj_bloki(bufor, zapis_wav, kwantyzator, bledy):
+    try:
+        while True:
+            blok = bufor.wyjmij()
+            if blok is None:
+                break
+            zapis_wav.zapisz(kwantyzator.kwantyzuj(blok))
+            bufor.zwolnij()
+    except Exception as e:
+        bledy.append(e)
+        # Odblokowanie wątku nagrywającego - dalsze bloki są odrzucane
+        while bufor.wyjmij() is not None:
+            bufor.zwolnij()
+
+
+def nagrywaj_strumieniowo(nazwa_pliku, czas_trwania_s, czestotliwosc_probkowania, glebia_bitowa, kanaly=KANALY,
+                          mikrofon=None, rozmiar_bloku=ROZMIAR_BLOKU, glebokosc_bufora=GLEBOKOSC_BUFORA, dither=False):
+    """
+    Nagrywa blokami po rozmiar_bloku ramek przez kontekst mikrofon.recorder(...) i od razu
+    dopisuje je do pliku WAV. Nagrywanie i kwantyzacja z zapisem działają w osobnych wątkach
+    połączonych buforem pierścieniowym, więc chwilowe przestoje dysku nie gubią próbek,
+    a pamięć nie zależy od długości nagrania.
+    mikrofon - obiekt z metodą recorder(samplerate, channels, blocksize) jak w soundcard;
+    None oznacza domyślny mikrofon systemu.
+    dither - kwantyzacja z ditherem TPDF (Kwantyzator).
+    Zwraca słownik z liczbą ramek, bloków i przepełnień bufora.
+    """
+    if mikrofon is None:
+        mikrofon = domyslny_mikrofon()
+    if glebia_bitowa not in WSPIERANE_GLEBIE_BITOWE:
+        print(f"Nieobsługiwana głębia bitowa: {glebia_bitowa}. Zapisuję jako 16-bit.")
+        glebia_bitowa = 16
+    liczba_ramek = int(czas_trwania_s * czestotliwosc_probkowania)
+    bufor = BuforPierscieniowy(glebokosc_bufora, rozmiar_bloku, kanaly)
+    bledy = []
+    bloki = 0
+    with StrumieniowyZapisWav(nazwa_pliku, czestotliwosc_probkowania, glebia_bitowa, kanaly) as zapis_wav:
+        kwantyzator = Kwantyzator(glebia_bitowa, rozmiar_bloku, kanaly, dither)
+        watek_zapisu = threading.Thread(target=_zapisuj_bloki, args=(bufor, zapis_wav, kwantyzator, bledy))
+        watek_zapisu.start()
+        try:
+            with mikrofon.recorder(samplerate=czestotliwosc_probkowania, channels=kanaly,
+                                   blocksize=rozmiar_bloku) as rekorder:
+                pozostalo = liczba_ramek
+                while pozostalo > 0 and not bledy:
+                    # soundcard zazwyczaj zwraca dane jako float32 w zakresie [-1.0, 1.0]
+                    blok = rekorder.record(numframes=min(rozmiar_bloku, pozostalo))
+                    bufor.wloz(blok)
+                    pozostalo -= len(blok)
+                    bloki += 1
+        finally:
+            bufor.zamknij()
+            watek_zapisu.join()
+    if bledy:
+        raise bledy[0]
+    return {"ramki": liczba_ramek - max(pozostalo, 0), "bloki": bloki, "przepelnienia": bufor.przepelnienia}
+
+
+def nagrywaj_i_zapisz_audio(nazwa_pliku, czas_trwania_s, czestotliwosc_probkowania, glebia_bitowa, kanaly=KANALY,
+                            mikrofon=None):
     print(f"\nRozpoczynanie nagrywania: {nazwa_pliku}")
     print(f"Parametry: czas={czas_trwania_s}s, Fs={czestotliwosc_probkowania}Hz, bity={glebia_bitowa}, kanały={kanaly}")
 
     try:
-        mikrofon = sc.default_microphone()
-        # Nagrywanie - soundcard zazwyczaj zwraca dane jako float32 w zakresie [-1.0, 1.0]
-        liczba_ramek = int(czas_trwania_s * czestotliwosc_probkowania)
-        nagranie_float = mikrofon.record(numframes=liczba_ramek, samplerate=czestotliwosc_probkowania, channels=kanaly)
-
-        print("Nagrywanie zakończone. Rozpoczynanie kwantyzacji i zapisu...")
-
-        # Kwantyzacja i konwersja do odpowiedniego formatu całkowitoliczbowego dla WAV
-        if glebia_bitowa == 8:
-            # Skalowanie do zakresu [0, 255] dla uint8
-            # (nagranie_float + 1.0) / 2.0  => mapuje [-1,1] na [0,1]
-            # * 255                         => mapuje [0,1] na [0,255]
-            dane_skwantyzowane = ((nagranie_float + 1.0) / 2.0 * 255).astype(np.uint8)
-        elif glebia_bitowa == 16:
-            # Skalowanie do zakresu [-32768, 32767] dla int16
-            dane_skwantyzowane = (nagranie_float * 32767).astype(np.int16)
-        elif glebia_bitowa == 32:
-            # Skalowanie do zakresu [-2147483648, 2147483647] dla int32
-            dane_skwantyzowane = (nagranie_float * (2 ** 31 - 1)).astype(np.int32)
-        else:
-            print(f"Nieobsługiwana głębia bitowa: {glebia_bitowa}. Zapisuję jako 16-bit.")
-            dane_skwantyzowane = (nagranie_float * 32767).astype(np.int16)
-
-        # Zapis do pliku WAV
-        write(nazwa_pliku, czestotliwosc_probkowania, dane_skwantyzowane)
+        # Nagrywanie, kwantyzacja i zapis do pliku WAV odbywają się blokami w trakcie nagrania
+        wynik = nagrywaj_strumieniowo(nazwa_pliku, czas_trwania_s, czestotliwosc_probkowania, glebia_bitowa, kanaly,
+                                      mikrofon)
+        print(f"Nagrywanie zakończone ({wynik['bloki']} bloków, przepełnienia bufora: {wynik['przepelnienia']}).")
         print(f"Dźwięk zapisany jako: {nazwa_pliku}")
 
     except Exception as e:
         print(f"Wystąpił błąd podczas nagrywania lub zapisu: {e}")
 
 
-def odtworz_audio_z_pliku(nazwa_pliku):
-    print(f"\nOdtwarzanie pliku: {nazwa_pliku}")
-    try:
-        czestotliwosc_probkowania, dane_audio = read(nazwa_pliku)
-        print(f"Odczytana częstotliwość próbkowania: {czestotliwosc_probkowania} Hz")
-        print(f"Oryginalny typ danych wczytanych z pliku: {dane_audio.dtype}")
-
-        # Konwersja do float32 i normalizacja do zakresu [-1.0, 1.0]
-        dane_znormalizowane = None
-        if dane_audio.dtype == np.int16:
-            # Zakres int16: -32768 do 32767
-            dane_znormalizowane = dane_audio.astype(np.float32) / np.iinfo(np.int16).max
-        elif dane_audio.dtype == np.int32:
-            # Zakres int32: -2147483648 do 2147483647
-            dane_znormalizowane = dane_audio.astype(np.float32) / np.iinfo(np.int32).max
-        elif dane_audio.dtype == np.uint8:
-            # Zakres uint8: 0 do 255. Mapujemy [0, 255] -> [-1.0, 1.0]
-            dane_znormalizowane = (dane_audio.astype(np.float32) / 255.0 - 0.5) * 2.0
-        elif dane_audio.dtype == np.float32:
-            # Jeśli plik WAV jest już float32, zakładamy, że jest już w odpowiednim zakresie.
-            # W praktyce pliki WAV float32 często mają zakres [-1.0, 1.0].
-            dane_znormalizowane = dane_audio
-        else:
-            print(f"Nierozpoznany lub nieobsługiwany typ danych z pliku WAV: {dane_audio.dtype}.")
-            print("Próba odtworzenia może się nie udać lub dźwięk może być zniekształcony.")
-            dane_znormalizowane = dane_audio.astype(np.float32)
+def domyslny_glosnik():
+    import soundcard as sc
+    return sc.default_speaker()
 
 
-        if dane_znormalizowane is not None:
+def normalizuj_blok(blok, bufor_float, glebia_bitowa=None):
+    """
+    Konwertuje blok próbek z pliku WAV do float32 w zakresie [-1.0, 1.0], zapisując wynik
+    w podanym buforze (bez tworzenia tablic pośrednich). Zwraca bufor_float.
+    glebia_bitowa - potrzebna dla 24 bitów (blok int32 z rozpakuj_24); inaczej wynika z typu bloku.
+    """
+    if glebia_bitowa == 24:
+        # Zakres 24-bit: -8388608 do 8388607
+        np.multiply(blok, np.float32(1.0 / SKALE_KWANTYZACJI[24]), out=bufor_float, casting='unsafe')
+    elif blok.dtype == np.int16:
+        # Zakres int16: -32768 do 32767
+        np.multiply(blok, np.float32(1.0 / np.iinfo(np.int16).max), out=bufor_float, casting='unsafe')
+    elif blok.dtype == np.int32:
+        # Zakres int32: -2147483648 do 2147483647
+        np.multiply(blok, np.float32(1.0 / np.iinfo(np.int32).max), out=bufor_float, casting='unsafe')
+    elif blok.dtype == np.uint8:
+        # Zakres uint8: 0 do 255. Mapujemy [0, 255] -> [-1.0, 1.0]
+        np.multiply(blok, np.float32(2.0 / 255.0), out=bufor_float, casting='unsafe')
+        np.subtract(bufor_float, np.float32(1.0), out=bufor_float)
+    else:
+        # Pliki WAV float32 zakładamy już w zakresie [-1.0, 1.0]; pozostałe typy kopiujemy bez skalowania
+        np.copyto(bufor_float, blok, casting='unsafe')
+    return bufor_float
 
-            glosnik = sc.default_speaker()
-            glosnik.play(dane_znormalizowane, samplerate=czestotliwosc_probkowania)
-            print("Odtwarzanie rozpoczęte. Powinno zakończyć się automatycznie.")
 
-        else:
-            print("Nie udało się przygotować danych do odtworzenia.")
+def odtwarzaj_strumieniowo(nazwa_pliku, glosnik=None, rozmiar_bloku=ROZMIAR_BLOKU):
+    """
+    Odtwarza plik WAV blokami po rozmiar_bloku ramek. Plik jest mapowany do pamięci,
+    a każdy blok jest normalizowany do jednego, wielokrotnie używanego bufora float32
+    i od razu przekazywany do odtwarzacza - odtwarzanie zaczyna się po pierwszym bloku,
+    a zużycie pamięci nie zależy od długości pliku.
+    glosnik - obiekt z metodą player(samplerate, channels, blocksize) jak w soundcard;
+    None oznacza domyślny głośnik systemu.
+    Zwraca słownik z częstotliwością próbkowania, typem danych, liczbą ramek i bloków.
+    """
+    czestotliwosc_probkowania, glebia_bitowa, dane_audio = otworz_wav(nazwa_pliku)
+    if glosnik is None:
+        glosnik = domyslny_glosnik()
+    kanaly = dane_audio.shape[1]
+    bufor_float = np.empty((rozmiar_bloku, kanaly), dtype=np.float32)
+    bufor_24 = np.empty((rozmiar_bloku, kanaly), dtype=np.int32) if glebia_bitowa == 24 else None
+    bloki = 0
+    with glosnik.player(samplerate=czestotliwosc_probkowania, channels=kanaly, blocksize=rozmiar_bloku) as odtwarzacz:
+        for poczatek in range(0, len(dane_audio), rozmiar_bloku):
+            blok = dane_audio[poczatek:poczatek + rozmiar_bloku]
+            if bufor_24 is not None:
+                blok = rozpakuj_24(blok, bufor_24[:len(blok)])
+            odtwarzacz.play(normalizuj_blok(blok, bufor_float[:len(blok)], glebia_bitowa))
+            bloki += 1
+    return {"czestotliwosc_probkowania": czestotliwosc_probkowania,
+            "typ": f"{glebia_bitowa}-bit" if glebia_bitowa == 24 else dane_audio.dtype,
+            "ramki": len(dane_audio), "bloki": bloki}
+
+
+def _kwantyzuj_naiwnie(blok_float, glebia_bitowa):
+    # Dawna kwantyzacja: kilka tymczasowych tablic pełnego rozmiaru na każdą konwersję, bez nasycania
+    if glebia_bitowa == 8:
+        return ((blok_float + 1.0) / 2.0 * 255).astype(np.uint8)
+    return (blok_float * SKALE_KWANTYZACJI[glebia_bitowa]).astype(TYPY_PROBEK[glebia_bitowa])
 
 
+def benchmark_kwantyzacji(czas_s=3600, czestotliwosc_probkowania=48000, rozmiar_bloku=1 << 16,
+                          glebie=WSPIERANE_GLEBIE_BITOWE, kanaly=(1, 2), cale_nagranie=False):
+    """
+    Mierzy przepustowość (próbki/s) i szczytową pamięć (tracemalloc) kwantyzacji nagrania
+    o długości czas_s dla mono i stereo: dawna kwantyzacja z tymczasowymi tablicami,
+    Kwantyzator na buforach przydzielonych raz oraz Kwantyzator z ditherem TPDF.
+    Dane przetwarzane są blokami po rozmiar_bloku ramek (wejściem jest wciąż ten sam blok).
+    cale_nagranie=True dodaje dawną kwantyzację całego nagrania naraz (tak działało nagrywanie
+    przed podziałem na bloki) - wymaga kilku GB pamięci dla godziny stereo.
+    """
+    wyniki = []
+    tryby = ("naiwny", "bufory", "dither") + (("całość",) if cale_nagranie else ())
+    print(f"{'kanały':>6} {'bity':>4} {'tryb':>10} {'Mpróbek/s':>10} {'pamięć [MB]':>12}")
+    for liczba_kanalow in kanaly:
+        blok = np.random.default_rng(0).uniform(-1.0, 1.0, (rozmiar_bloku, liczba_kanalow)).astype(np.float32)
+        ramki = int(czas_s * czestotliwosc_probkowania)
+        for glebia_bitowa in glebie:
+            for tryb in tryby:
+                # Wejście całego nagrania przydzielane przed pomiarem - liczą się tylko tablice tymczasowe
+                nagranie = np.resize(blok, (ramki, liczba_kanalow)) if tryb == "całość" else None
+                tracemalloc.start()
+                start = time.perf_counter()
+                if tryb == "całość":
+                    _kwantyzuj_naiwnie(nagranie, glebia_bitowa)
+                else:
+                    if tryb == "naiwny":
+                        kwantyzuj = lambda b: _kwantyzuj_naiwnie(b, glebia_bitowa)
+                    else:
+                        kwantyzuj = Kwantyzator(glebia_bitowa, rozmiar_bloku, liczba_kanalow,
+                                                tryb == "dither").kwantyzuj
+                    for poczatek in range(0, ramki, rozmiar_bloku):
+                        kwantyzuj(blok[:min(rozmiar_bloku, ramki - poczatek)])
+                czas = time.perf_counter() - start
+                del nagranie
+                _, szczyt = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                probki_na_s = ramki * liczba_kanalow / czas
+                print(f"{liczba_kanalow:>6} {glebia_bitowa:>4} {tryb:>10} {probki_na_s / 1e6:>10.1f} "
+                      f"{szczyt / (1024 * 1024):>12.2f}")
+                wyniki.append({"kanaly": liczba_kanalow, "glebia": glebia_bitowa, "tryb": tryb,
+                               "probki_na_s": probki_na_s, "pamiec_szczytowa": szczyt})
+    return wyniki
+
+
+def odtworz_audio_z_pliku(nazwa_pliku, glosnik=None):
+    print(f"\nOdtwarzanie pliku: {nazwa_pliku}")
+    try:
+        # Plik jest czytany, normalizowany i odtwarzany blokami
+        wynik = odtwarzaj_strumieniowo(nazwa_pliku, glosnik)
+        print(f"Odczytana częstotliwość próbkowania: {wynik['czestotliwosc_probkowania']} Hz")
+        print(f"Oryginalny typ danych wczytanych z pliku: {wynik['typ']}")
+        print(f"Odtwarzanie zakończone ({wynik['bloki']} bloków).")
+
     except FileNotFoundError:
         print(f"Błąd: Plik '{nazwa_pliku}' nie został znaleziony.")
     except Exception as e:
-        print(f"Wystąpił błąd podczas wczytywania lub przygotowywania do odtwarzania: {e}")
+        print(f"Wystąpił błąd podczas wczytywania lub odtwarzania: {e}")
         import traceback
         traceback.print_exc()
 
 
-def pobierz_parametry_nagrywania():
+class _SztucznyStrumien:
+    # Wspólne tempo urządzeń bez sprzętu: blok kończy się po czasie wynikającym z liczby ramek od startu
+    def __init__(self, czestotliwosc_probkowania, kanaly, tempo):
+        self.czestotliwosc_probkowania = czestotliwosc_probkowania
+        self.kanaly = kanaly
+        self.tempo = tempo
+        self.ramki = 0
+        self._start = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, wyjatek, slad):
+        return False
+
+    def _czekaj_na_ramki(self, ramki):
+        if self._start is None:
+            self._start = time.perf_counter()
+        self.ramki += ramki
+        if self.tempo:
+            opoznienie = self._start + self.ramki / self.czestotliwosc_probkowania - time.perf_counter()
+            if opoznienie > 0:
+                time.sleep(opoznienie)
+
+
+class _SztucznyRekorder(_SztucznyStrumien):
+    def __init__(self, czestotliwosc_probkowania, kanaly, tempo, czestotliwosc_tonu, amplituda):
+        super().__init__(czestotliwosc_probkowania, kanaly, tempo)
+        self.czestotliwosc_tonu = czestotliwosc_tonu
+        self.amplituda = amplituda
+
+    def __enter__(self):
+        # Nagrywanie biegnie od otwarcia strumienia; odtwarzanie - od pierwszego bloku
+        self._start = time.perf_counter()
+        return self
+
+    def record(self, numframes):
+        t = np.arange(self.ramki, self.ramki + numframes) / self.czestotliwosc_probkowania
+        blok = (self.amplituda * np.sin(2 * np.pi * self.czestotliwosc_tonu * t)).astype(np.float32)
+        self._czekaj_na_ramki(numframes)
+        return np.repeat(blok[:, np.newaxis], self.kanaly, axis=1)
+
+
+class _SztucznyOdtwarzacz(_SztucznyStrumien):
+    def play(self, dane):
+        self._czekaj_na_ramki(len(dane))
+
+
+class SztucznyMikrofon:
+    """
+    Mikrofon bez sprzętu (testy, benchmarki): ton sinusoidalny podawany blokami.
+    tempo=True oddaje bloki w tempie rzeczywistym, jak prawdziwe urządzenie.
+    """
+    def __init__(self, czestotliwosc_tonu=440.0, amplituda=0.5, tempo=True):
+        self.czestotliwosc_tonu = czestotliwosc_tonu
+        self.amplituda = amplituda
+        self.tempo = tempo
+
+    def recorder(self, samplerate, channels=KANALY, blocksize=None):
+        return _SztucznyRekorder(samplerate, channels, self.tempo, self.czestotliwosc_tonu, self.amplituda)
+
+
+class SztucznyGlosnik:
+    """
+    Głośnik bez sprzętu: przyjmuje bloki w tempie rzeczywistym (tempo=True) i je odrzuca.
+    """
+    def __init__(self, tempo=True):
+        self.tempo = tempo
+
+    def player(self, samplerate, channels=KANALY, blocksize=None):
+        return _SztucznyOdtwarzacz(samplerate, channels, self.tempo)
+
+
+def _percentyle(wartosci, skala=1.0):
+    if not wartosci:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    p50, p95 = np.percentile(wartosci, [50, 95]) * skala
+    return {"p50": p50, "p95": p95, "max": max(wartosci) * skala}
+
+
+def monitoruj(czas_trwania_s, czestotliwosc_probkowania, glebia_bitowa, kanaly=KANALY, mikrofon=None, glosnik=None,
+              rozmiar_bloku=256, glebokosc_kolejki=4, dither=False):
+    """
+    Odsłuch na żywo: wątek nagrywający pobiera bloki po rozmiar_bloku ramek, kwantyzuje je do
+    glebia_bitowa i z powrotem do float32, a wątek odtwarzający od razu je odtwarza.
+    Wątki łączy ograniczona kolejka (BuforPierscieniowy) o glebokosc_kolejki blokach:
+    pełna kolejka odrzuca blok (przepełnienie), pusta kolejka daje blok ciszy (niedobór).
+    mikrofon, glosnik - urządzenia jak w soundcard (None - domyślne systemu), np. SztucznyMikrofon.
+    Zwraca słownik z liczbą bloków, przepełnień i niedoborów, opóźnieniem od końca nagrania bloku
+    do przekazania go do odtwarzacza plus długość bloku [ms] oraz czasem przetwarzania bloku [us].
+    """
+    if mikrofon is None:
+        mikrofon = domyslny_mikrofon()
+    if glosnik is None:
+        glosnik = domyslny_glosnik()
+    if glebia_bitowa not in WSPIERANE_GLEBIE_BITOWE:
+        glebia_bitowa = 16
+    liczba_ramek = int(czas_trwania_s * czestotliwosc_probkowania)
+    czas_bloku = rozmiar_bloku / czestotliwosc_probkowania
+    kolejka = BuforPierscieniowy(glebokosc_kolejki, rozmiar_bloku, kanaly)
+    kwantyzator = Kwantyzator(glebia_bitowa, rozmiar_bloku, kanaly, dither)
+    bufor_float = np.empty((rozmiar_bloku, kanaly), dtype=np.float32)
+    cisza = np.zeros((rozmiar_bloku, kanaly), dtype=np.float32)
+    czasy_przetwarzania = []
+    opoznienia = []
+    niedobory = [0]
+    bledy = []
+
+    def nagrywaj():
+        try:
+            with mikrofon.recorder(samplerate=czestotliwosc_probkowania, channels=kanaly,
+                                   blocksize=rozmiar_bloku) as rekorder:
+                pozostalo = liczba_ramek
+                while pozostalo > 0 and not bledy:
+                    blok = rekorder.record(numframes=min(rozmiar_bloku, pozostalo))
+                    nagrany = time.perf_counter()
+                    ramki = len(blok)
+                    dane = kwantyzator.kwantyzuj(blok)
+                    wynik = normalizuj_blok(dane, bufor_float[:ramki], glebia_bitowa)
+                    czasy_przetwarzania.append(time.perf_counter() - nagrany)
+                    kolejka.wloz(wynik, nagrany, czekaj=False)
+                    pozostalo -= ramki
+        except Exception as e:
+            bledy.append(e)
+        finally:
+            kolejka.zamknij()
+
+    def odtwarzaj():
+        try:
+            with glosnik.player(samplerate=czestotliwosc_probkowania, channels=kanaly,
+                                blocksize=rozmiar_bloku) as odtwarzacz:
+                # Pierwszy blok czekamy bez liczenia niedoboru - odtwarzanie startuje, gdy są dane
+                blok = kolejka.wyjmij()
+                while True:
+                    if blok is None:
+                        if kolejka.zamkniety:
+                            # Nagrywanie mogło włożyć ostatni blok tuż przed zamknięciem -
+                            # kończymy dopiero, gdy po zamknięciu kolejka jest pusta
+                            blok = kolejka.wyjmij(czekaj=False)
+                            if blok is None:
+                                break
+                            continue
+                        niedobory[0] += 1
+                        odtwarzacz.play(cisza)
+                    else:
+                        opoznienia.append(time.perf_counter() - kolejka.znacznik_odczytu + czas_bloku)
+                        odtwarzacz.play(blok)
+                        kolejka.zwolnij()
+                    blok = kolejka.wyjmij(czekaj=False)
+        except Exception as e:
+            bledy.append(e)
+            # Opróżnianie kolejki, żeby nagrywanie nie stało na pełnym buforze
+            while kolejka.wyjmij(czekaj=False) is not None:
+                kolejka.zwolnij()
+
+    watki = [threading.Thread(target=nagrywaj), threading.Thread(target=odtwarzaj)]
+    for watek in watki:
+        watek.start()
+    for watek in watki:
+        watek.join()
+    if bledy:
+        raise bledy[0]
+    return {"bloki": len(czasy_przetwarzania), "przepelnienia": kolejka.przepelnienia, "niedobory": niedobory[0],
+            "czas_bloku_ms": czas_bloku * 1000, "opoznienie_ms": _percentyle(opoznienia, 1000),
+            "przetwarzanie_us": _percentyle(czasy_przetwarzania, 1e6)}
+
+
+def wypisz_wynik_monitora(wynik):
+    print(f"Bloki: {wynik['bloki']} po {wynik['czas_bloku_ms']:.2f} ms, przepełnienia: {wynik['przepelnienia']}, "
+          f"niedobory: {wynik['niedobory']}")
+    print("Opóźnienie [ms]: p50 {p50:.2f}, p95 {p95:.2f}, max {max:.2f}".format(**wynik['opoznienie_ms']))
+    print("Przetwarzanie bloku [us]: p50 {p50:.1f}, p95 {p95:.1f}, max {max:.1f}".format(**wynik['przetwarzanie_us']))
+
+
+def benchmark_monitora(czas_trwania_s=2.0, czestotliwosc_probkowania=48000, glebia_bitowa=16,
+                       rozmiary_blokow=(128, 256, 512, 1024), glebokosci_kolejki=(2, 4, 8)):
+    """
+    Mierzy opóźnienie, niedobory i przepełnienia odsłuchu na urządzeniach bez sprzętu
+    działających w tempie rzeczywistym dla różnych rozmiarów bloku i głębokości kolejki.
+    """
+    wyniki = []
+    print(f"{'blok':>5} {'kolejka':>7} {'przepełn.':>9} {'niedobory':>9} {'opóźn. p50':>11} {'opóźn. p95':>11} "
+          f"{'przetw. p95 [us]':>17}")
+    for rozmiar_bloku in rozmiary_blokow:
+        for glebokosc_kolejki in glebokosci_kolejki:
+            wynik = monitoruj(czas_trwania_s, czestotliwosc_probkowania, glebia_bitowa, mikrofon=SztucznyMikrofon(),
+                              glosnik=SztucznyGlosnik(), rozmiar_bloku=rozmiar_bloku,
+                              glebokosc_kolejki=glebokosc_kolejki)
+            print(f"{rozmiar_bloku:>5} {glebokosc_kolejki:>7} {wynik['przepelnienia']:>9} {wynik['niedobory']:>9} "
+                  f"{wynik['opoznienie_ms']['p50']:>9.2f}ms {wynik['opoznienie_ms']['p95']:>9.2f}ms "
+                  f"{wynik['przetwarzanie_us']['p95']:>17.1f}")
+            wyniki.append({"rozmiar_bloku": rozmiar_bloku, "glebokosc_kolejki": glebokosc_kolejki, **wynik})
+    return wyniki
+
+
+def pobierz_parametry_nagrywania(pytaj_o_plik=True):
     while True:
         try:
             glebia = int(input(f"Podaj poziom kwantyzacji {WSPIERANE_GLEBIE_BITOWE}: "))
@@ -121,6 +694,9 @@ def pobierz_parametry_nagrywania():
         except ValueError:
             print("Proszę podać liczbę całkowitą.")
 
+    if not pytaj_o_plik:
+        return None, czas, probkowanie, glebia
+
     nazwa_pliku_sugerowana = f"nagranie_b{glebia}_fs{probkowanie}.wav"
     nazwa_pliku_uzytkownika = input(f"Podaj nazwę pliku do zapisu (sugerowana: '{nazwa_pliku_sugerowana}'): ")
     if not nazwa_pliku_uzytkownika.strip():
@@ -138,7 +714,9 @@ def main():
         opcja = input("Wybierz opcję:\n"
                       "1. Nagrywanie dźwięku\n"
                       "2. Odtwarzanie dźwięku\n"
-                      "3. Koniec programu\n"
+                      "3. Odsłuch na żywo (nagrywanie -> kwantyzacja -> odtwarzanie)\n"
+                      "4. Benchmark kwantyzacji (1 h mono i stereo)\n"
+                      "5. Koniec programu\n"
                       "Twój wybór: ")
 
         if opcja == '1':
@@ -152,6 +730,16 @@ def main():
             odtworz_audio_z_pliku(nazwa_pliku_do_odtworzenia)
 
         elif opcja == '3':
+            _, czas, probkowanie, glebia = pobierz_parametry_nagrywania(pytaj_o_plik=False)
+            try:
+                wypisz_wynik_monitora(monitoruj(czas, probkowanie, glebia))
+            except Exception as e:
+                print(f"Wystąpił błąd podczas odsłuchu: {e}")
+
+        elif opcja == '4':
+            benchmark_kwantyzacji()
+
+        elif opcja == '5':
             print("Zamykanie programu.")
             break
         else:
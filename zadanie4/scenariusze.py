@@ -0,0 +1,187 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import gcd
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from scipy.signal import resample_poly, welch
+from main import Kwantyzator, normalizuj_blok, otworz_wav, rozpakuj_24, StrumieniowyZapisWav, SKALE_KWANTYZACJI
+
+# Plik z listą scenariuszy: numer, głębia bitowa, częstotliwość próbkowania, nazwa pliku, opis (oddzielone tabulatorami)
+PLIK_SCENARIUSZY = "scenariusze.txt"
+# Częstotliwość próbkowania syntetycznego sygnału źródłowego
+FS_ZRODLA = 96000
+# Tony sygnału syntetycznego: (częstotliwość [Hz], amplituda) - szczyt sumy poniżej 1.0
+TONY_ZRODLA = ((440.0, 0.45), (1000.0, 0.25), (3150.0, 0.1), (6300.0, 0.05))
+# Liczba próbek przetwarzanych naraz przy kwantyzacji, zapisie i liczeniu miar
+BLOK_ANALIZY = 1 << 20
+# Długość segmentu metody Welcha dla widma szumu kwantyzacji
+SEGMENT_WIDMA = 4096
+
+
+def wczytaj_scenariusze(sciezka=PLIK_SCENARIUSZY):
+    scenariusze = []
+    with open(sciezka, encoding='utf-8') as f:
+        for linia in f:
+            pola = linia.rstrip("\n").split("\t")
+            if len(pola) < 4:
+                continue
+            scenariusze.append({"numer": int(pola[0]), "glebia": int(pola[1]), "fs": int(pola[2]),
+                                "plik": pola[3], "opis": pola[4] if len(pola) > 4 else ""})
+    return scenariusze
+
+
+def sygnal_syntetyczny(czas_s, fs=FS_ZRODLA, tony=TONY_ZRODLA):
+    """
+    Suma tonów (float64, mono) - wzorzec o znanej zawartości widmowej.
+    """
+    t = np.arange(int(czas_s * fs)) / fs
+    sygnal = np.zeros(len(t))
+    for czestotliwosc, amplituda in tony:
+        sygnal += amplituda * np.sin(2 * np.pi * czestotliwosc * t)
+    return sygnal
+
+
+def wczytaj_zrodlo(nazwa_pliku):
+    """
+    Wczytuje plik WAV jako wzorzec float64 mono (kanały są uśredniane). Zwraca (fs, sygnał).
+    """
+    fs, glebia_bitowa, dane = otworz_wav(nazwa_pliku)
+    sygnal = np.empty(len(dane))
+    bufor = np.empty((min(len(dane), BLOK_ANALIZY), dane.shape[1]), dtype=np.float32)
+    bufor_24 = np.empty(bufor.shape, dtype=np.int32) if glebia_bitowa == 24 else None
+    for poczatek in range(0, len(dane), BLOK_ANALIZY):
+        blok = dane[poczatek:poczatek + BLOK_ANALIZY]
+        if bufor_24 is not None:
+            blok = rozpakuj_24(blok, bufor_24[:len(blok)])
+        sygnal[poczatek:poczatek + len(blok)] = normalizuj_blok(blok, bufor[:len(blok)], glebia_bitowa).mean(axis=1)
+    return fs, sygnal
+
+
+def odkwantyzuj(dane_skwantyzowane, glebia_bitowa):
+    """
+    Odwrotność kwantyzacji z Kwantyzator liczona w float64 (dokładniej niż przy odtwarzaniu,
+    żeby szum kwantyzacji 32-bit nie ginął w błędzie zaokrągleń float32).
+    """
+    if glebia_bitowa == 8:
+        return dane_skwantyzowane / 255.0 * 2.0 - 1.0
+    return dane_skwantyzowane / SKALE_KWANTYZACJI[glebia_bitowa]
+
+
+def _przetworz_scenariusz(scenariusz, spec_zrodla, fs_zrodla, katalog, dither=False):
+    """
+    Proces roboczy: przepróbkowuje wzorzec z pamięci współdzielonej do fs scenariusza,
+    kwantyzuje go blokami, zapisuje WAV i liczy miary jakości względem przepróbkowanego wzorca.
+    """
+    start = time.perf_counter()
+    nazwa, dtype, shape = spec_zrodla
+    pamiec = SharedMemory(name=nazwa)
+    try:
+        zrodlo = np.ndarray(shape, dtype=dtype, buffer=pamiec.buf)
+        dzielnik = gcd(scenariusz["fs"], fs_zrodla)
+        wzorzec = resample_poly(zrodlo, scenariusz["fs"] // dzielnik, fs_zrodla // dzielnik)
+        del zrodlo  # widok musi zniknąć przed zamknięciem pamięci
+    finally:
+        pamiec.close()
+
+    kwantyzator = Kwantyzator(scenariusz["glebia"], min(len(wzorzec), BLOK_ANALIZY), dither=dither,
+                              typ_float=np.float64)
+    # Sumy do miar liczonych blokami: wzorzec x, błąd e = wynik - wzorzec
+    suma_x = suma_xx = suma_e = suma_ee = suma_ex = 0.0
+    widmo = np.zeros(SEGMENT_WIDMA // 2 + 1)
+    segmenty = 0
+    with StrumieniowyZapisWav(os.path.join(katalog, scenariusz["plik"]), scenariusz["fs"],
+                              scenariusz["glebia"]) as zapis_wav:
+        for poczatek in range(0, len(wzorzec), BLOK_ANALIZY):
+            x = wzorzec[poczatek:poczatek + BLOK_ANALIZY]
+            dane_skwantyzowane = kwantyzator.kwantyzuj(x)
+            zapis_wav.zapisz(dane_skwantyzowane)
+            blad = odkwantyzuj(dane_skwantyzowane[:, 0], scenariusz["glebia"])
+            blad -= x
+            suma_x += x.sum()
+            suma_xx += np.dot(x, x)
+            suma_e += blad.sum()
+            suma_ee += np.dot(blad, blad)
+            suma_ex += np.dot(blad, x)
+            if len(blad) >= SEGMENT_WIDMA:
+                czestotliwosci, gestosc = welch(blad, scenariusz["fs"], nperseg=SEGMENT_WIDMA)
+                waga = len(blad) // SEGMENT_WIDMA
+                widmo += gestosc * waga
+                segmenty += waga
+
+    n = len(wzorzec)
+    # SINAD: moc wzorca do mocy całego błędu (szum, zniekształcenia, przesunięcie DC, błąd wzmocnienia)
+    sinad = 10 * np.log10(suma_xx / suma_ee) if suma_ee else np.inf
+    # SNR: błąd po odjęciu dopasowania liniowego e ~ a*x + b, czyli bez przesunięcia DC i błędu wzmocnienia
+    # (liczone na sumach błędu, a nie wyniku, żeby przy 32 bitach nie tracić precyzji na odejmowaniu)
+    wariancja_x = suma_xx / n - (suma_x / n) ** 2
+    kowariancja = suma_ex / n - suma_e * suma_x / n ** 2
+    moc_szumu = max(suma_ee / n - (suma_e / n) ** 2 - kowariancja ** 2 / wariancja_x, 0.0)
+    snr = 10 * np.log10(suma_xx / n / moc_szumu) if moc_szumu else np.inf
+    if segmenty:
+        widmo /= segmenty
+    else:
+        czestotliwosci = np.array([])
+        widmo = np.array([])
+    return {**scenariusz, "probki": n, "snr_db": snr, "sinad_db": sinad, "enob": (sinad - 1.76) / 6.02,
+            "poziom_szumu_db": 10 * np.log10(np.median(widmo)) if len(widmo) else np.nan,
+            "czestotliwosci": czestotliwosci, "widmo_szumu": widmo, "czas_s": time.perf_counter() - start}
+
+
+def uruchom_scenariusze(zrodlo=None, czas_s=600, fs_zrodla=FS_ZRODLA, sciezka_scenariuszy=PLIK_SCENARIUSZY,
+                        katalog=".", workers=None, plik_widm=None, dither=False):
+    """
+    Tworzy pliki wszystkich scenariuszy z jednego sygnału źródłowego bez nagrywania:
+    zrodlo - nazwa pliku WAV albo None dla sygnału syntetycznego o długości czas_s i częstotliwości fs_zrodla.
+    Scenariusze przetwarzane są równolegle w workers procesach; wzorzec trafia do pamięci współdzielonej
+    raz, a procesy dostają tylko jej nazwę. Wypisuje tabelę wyników i ją zwraca;
+    plik_widm - plik .npz, do którego zapisać widma szumu kwantyzacji; dither - kwantyzacja z ditherem TPDF.
+    """
+    start = time.perf_counter()
+    scenariusze = wczytaj_scenariusze(sciezka_scenariuszy)
+    if zrodlo is None:
+        sygnal = sygnal_syntetyczny(czas_s, fs_zrodla)
+    else:
+        fs_zrodla, sygnal = wczytaj_zrodlo(zrodlo)
+    os.makedirs(katalog, exist_ok=True)
+
+    pamiec = SharedMemory(create=True, size=max(sygnal.nbytes, 1))
+    try:
+        widok = np.ndarray(sygnal.shape, dtype=sygnal.dtype, buffer=pamiec.buf)
+        widok[...] = sygnal
+        spec = (pamiec.name, sygnal.dtype.str, sygnal.shape)
+        del widok, sygnal
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            wyniki = list(pool.map(_przetworz_scenariusz, scenariusze, [spec] * len(scenariusze),
+                                   [fs_zrodla] * len(scenariusze), [katalog] * len(scenariusze),
+                                   [dither] * len(scenariusze)))
+    finally:
+        pamiec.close()
+        pamiec.unlink()
+
+    print(f"{'nr':>3} {'bity':>4} {'Fs [Hz]':>8} {'SNR [dB]':>9} {'SINAD [dB]':>11} {'ENOB':>6} "
+          f"{'szum [dB/Hz]':>13} {'czas [s]':>9}  plik")
+    for wynik in wyniki:
+        print(f"{wynik['numer']:>3} {wynik['glebia']:>4} {wynik['fs']:>8} {wynik['snr_db']:>9.2f} "
+              f"{wynik['sinad_db']:>11.2f} {wynik['enob']:>6.2f} {wynik['poziom_szumu_db']:>13.1f} "
+              f"{wynik['czas_s']:>9.2f}  {wynik['plik']}")
+    print(f"Łącznie: {time.perf_counter() - start:.2f} s")
+    if plik_widm is not None:
+        np.savez(plik_widm, **{f"scenariusz_{w['numer']}_f": w["czestotliwosci"] for w in wyniki},
+                 **{f"scenariusz_{w['numer']}_widmo": w["widmo_szumu"] for w in wyniki})
+    return wyniki
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Wsadowe tworzenie plików scenariuszy z jednego sygnału źródłowego.")
+    parser.add_argument("--zrodlo", help="plik WAV źródłowy (domyślnie sygnał syntetyczny)")
+    parser.add_argument("--czas", type=float, default=600, help="długość sygnału syntetycznego w sekundach")
+    parser.add_argument("--scenariusze", default=PLIK_SCENARIUSZY)
+    parser.add_argument("--katalog", default=".", help="katalog na pliki WAV")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--widma", help="plik .npz na widma szumu kwantyzacji")
+    parser.add_argument("--dither", action="store_true", help="kwantyzacja z ditherem TPDF")
+    args = parser.parse_args()
+    uruchom_scenariusze(args.zrodlo, args.czas, sciezka_scenariuszy=args.scenariusze, katalog=args.katalog,
+                        workers=args.workers, plik_widm=args.widma, dither=args.dither)
@@ -0,0 +1,215 @@
+import struct
+import threading
+import numpy as np
+import pytest
+import main
+from main import Kwantyzator, monitoruj, nagrywaj_strumieniowo, otworz_wav, rozpakuj_24, SKALE_KWANTYZACJI
+
+CZESTOTLIWOSC = 8000
+ROZMIAR = 64
+
+
+class NagranyMikrofon:
+    """
+    Mikrofon podający z góry zadane próbki (float32, kształt (ramki, kanały)) blokami bez czekania.
+    """
+    def __init__(self, probki):
+        self.probki = probki
+        self.bloki = 0
+
+    def recorder(self, samplerate, channels, blocksize=None):
+        return self
+
+    def __enter__(self):
+        self._pozycja = 0
+        return self
+
+    def __exit__(self, typ, wyjatek, slad):
+        return False
+
+    def record(self, numframes):
+        blok = self.probki[self._pozycja:self._pozycja + numframes]
+        self._pozycja += len(blok)
+        self.bloki += 1
+        return blok
+
+
+def _probki(ramki, kanaly, ziarno=0):
+    return np.random.default_rng(ziarno).uniform(-1.0, 1.0, (ramki, kanaly)).astype(np.float32)
+
+
+@pytest.mark.parametrize("glebia_bitowa", [16, 24])
+@pytest.mark.parametrize("kanaly", [1, 2])
+def test_nagrywanie_strumieniowe_zapisuje_wszystkie_bloki(tmp_path, glebia_bitowa, kanaly):
+    # 10 pełnych bloków i jeden niepełny, bufor na 2 bloki - wątek nagrywający musi czekać na zapis
+    ramki = 10 * ROZMIAR + 17
+    probki = _probki(ramki, kanaly)
+    mikrofon = NagranyMikrofon(probki)
+    sciezka = str(tmp_path / "nagranie.wav")
+
+    wynik = nagrywaj_strumieniowo(sciezka, ramki / CZESTOTLIWOSC, CZESTOTLIWOSC, glebia_bitowa, kanaly,
+                                  mikrofon=mikrofon, rozmiar_bloku=ROZMIAR, glebokosc_bufora=2)
+
+    assert wynik["ramki"] == ramki
+    assert wynik["bloki"] == mikrofon.bloki == 11
+    fs, glebia, dane = otworz_wav(sciezka)
+    assert (fs, glebia) == (CZESTOTLIWOSC, glebia_bitowa)
+    if glebia_bitowa == 24:
+        dane = rozpakuj_24(dane, np.empty(dane.shape[:2], dtype=np.int32))
+    assert dane.shape == (ramki, kanaly)
+    # Kwantyzacja obcina część ułamkową, więc próbka różni się od wejścia o mniej niż 1 LSB
+    skala = SKALE_KWANTYZACJI[glebia_bitowa]
+    assert np.all(np.abs(dane / skala - probki) <= 1.0 / skala)
+
+    with open(sciezka, 'rb') as f:
+        naglowek = f.read(44)
+        rozmiar_pliku = 44 + len(f.read())
+    rozmiar_riff, = struct.unpack_from('<I', naglowek, 4)
+    rozmiar_danych, = struct.unpack_from('<I', naglowek, 40)
+    assert rozmiar_danych == ramki * kanaly * glebia_bitowa // 8
+    assert rozmiar_riff == rozmiar_pliku - 8
+
+
+def test_kwantyzacja_32_bit_jest_symetryczna_i_dokladna():
+    probki = np.array([1.0, -1.0, 1e-6, -1e-6, 0.5], dtype=np.float32)
+    dane = Kwantyzator(32, len(probki)).kwantyzuj(probki)[:, 0]
+    oczekiwane = np.trunc(probki.astype(np.float64) * SKALE_KWANTYZACJI[32]).astype(np.int64)
+    assert dane.tolist() == oczekiwane.tolist()
+    assert dane[0] == -dane[1] == 2 ** 31 - 1
+
+
+class WstrzymanyMikrofon(NagranyMikrofon):
+    """
+    NagranyMikrofon, który przed blokiem numer wstrzymaj_przed czeka na zdarzenie wznow,
+    a po ostatnim bloku ustawia zdarzenie koniec.
+    """
+    def __init__(self, probki, wstrzymaj_przed=None):
+        super().__init__(probki)
+        self.wstrzymaj_przed = wstrzymaj_przed
+        self.wznow = threading.Event()
+        self.koniec = threading.Event()
+
+    def record(self, numframes):
+        if self.bloki == self.wstrzymaj_przed:
+            assert self.wznow.wait(5)
+        return super().record(numframes)
+
+    def __exit__(self, typ, wyjatek, slad):
+        self.koniec.set()
+        return False
+
+
+class ZapisujacyGlosnik:
+    """
+    Głośnik zapamiętujący odtworzone bloki. Pierwszy blok odtwarza dopiero po zdarzeniu czekaj_na
+    (np. końcu nagrywania), a po cisza_do_wznowienia blokach ciszy ustawia zdarzenie wznow.
+    """
+    def __init__(self, czekaj_na=None, wznow=None):
+        self.czekaj_na = czekaj_na
+        self.wznow = wznow
+        self.bloki = []
+        self.cisza = 0
+
+    def player(self, samplerate, channels, blocksize=None):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, wyjatek, slad):
+        return False
+
+    def play(self, blok):
+        if self.czekaj_na is not None and not self.bloki and not self.cisza:
+            assert self.czekaj_na.wait(5)
+        if np.any(blok):
+            self.bloki.append(blok.copy())
+        else:
+            self.cisza += 1
+            if self.wznow is not None:
+                self.wznow.set()
+
+
+def _monitoruj(mikrofon, glosnik, liczba_blokow, glebokosc_kolejki):
+    return monitoruj(liczba_blokow * ROZMIAR / CZESTOTLIWOSC, CZESTOTLIWOSC, 16, mikrofon=mikrofon, glosnik=glosnik,
+                     rozmiar_bloku=ROZMIAR, glebokosc_kolejki=glebokosc_kolejki)
+
+
+def test_monitor_oproznia_kolejke_po_zamknieciu():
+    # Odtwarzanie rusza dopiero po zamknięciu kolejki - wszystkie czekające bloki muszą zostać odtworzone
+    probki = _probki(6 * ROZMIAR, 1)
+    mikrofon = WstrzymanyMikrofon(probki)
+    glosnik = ZapisujacyGlosnik(czekaj_na=mikrofon.koniec)
+
+    wynik = _monitoruj(mikrofon, glosnik, 6, glebokosc_kolejki=8)
+
+    assert (wynik["bloki"], wynik["przepelnienia"], wynik["niedobory"]) == (6, 0, 0)
+    odtworzone = np.concatenate(glosnik.bloki)
+    assert odtworzone.shape == probki.shape
+    assert np.all(np.abs(odtworzone - probki) <= 1.0 / SKALE_KWANTYZACJI[16])
+
+
+class KolejkaZWyscigiem(main.BuforPierscieniowy):
+    """
+    Kolejka wymuszająca wyścig z końca nagrywania: ostatni blok jest wkładany i kolejka zamykana
+    dokładnie wtedy, gdy odtwarzacz zobaczył ją pustą (między wyjmij a sprawdzeniem zamkniety).
+    """
+    liczba_blokow = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wlozone = 0
+        self.pusta = threading.Event()
+        self.zamknieta = threading.Event()
+
+    def wloz(self, blok, znacznik=0.0, czekaj=True):
+        if self.wlozone == self.liczba_blokow - 1:
+            assert self.pusta.wait(5)
+        self.wlozone += 1
+        return super().wloz(blok, znacznik, czekaj)
+
+    def wyjmij(self, czekaj=True):
+        blok = super().wyjmij(czekaj)
+        if blok is None and not czekaj and not self.pusta.is_set():
+            self.pusta.set()
+            assert self.zamknieta.wait(5)
+        return blok
+
+    def zamknij(self):
+        super().zamknij()
+        self.zamknieta.set()
+
+
+def test_monitor_nie_gubi_bloku_wlozonego_tuz_przed_zamknieciem(monkeypatch):
+    KolejkaZWyscigiem.liczba_blokow = 3
+    monkeypatch.setattr(main, "BuforPierscieniowy", KolejkaZWyscigiem)
+    probki = _probki(3 * ROZMIAR, 1)
+    glosnik = ZapisujacyGlosnik()
+
+    wynik = _monitoruj(NagranyMikrofon(probki), glosnik, 3, glebokosc_kolejki=4)
+
+    assert (wynik["bloki"], wynik["przepelnienia"], wynik["niedobory"]) == (3, 0, 0)
+    assert np.concatenate(glosnik.bloki).shape == probki.shape
+
+
+def test_monitor_liczy_przepelnienia():
+    # Kolejka na 2 bloki, odtwarzacz stoi na pierwszym bloku do końca nagrywania: bloki 2-5 są odrzucane
+    mikrofon = WstrzymanyMikrofon(_probki(6 * ROZMIAR, 1))
+    glosnik = ZapisujacyGlosnik(czekaj_na=mikrofon.koniec)
+
+    wynik = _monitoruj(mikrofon, glosnik, 6, glebokosc_kolejki=2)
+
+    assert (wynik["bloki"], wynik["przepelnienia"], wynik["niedobory"]) == (6, 4, 0)
+    assert len(glosnik.bloki) == 2
+
+
+def test_monitor_liczy_niedobory():
+    # Nagrywanie drugiego bloku czeka, aż odtwarzacz zagra ciszę z powodu pustej kolejki
+    mikrofon = WstrzymanyMikrofon(_probki(2 * ROZMIAR, 1), wstrzymaj_przed=1)
+    glosnik = ZapisujacyGlosnik(wznow=mikrofon.wznow)
+
+    wynik = _monitoruj(mikrofon, glosnik, 2, glebokosc_kolejki=4)
+
+    assert (wynik["bloki"], wynik["przepelnienia"]) == (2, 0)
+    assert wynik["niedobory"] == glosnik.cisza >= 1
+    assert len(glosnik.bloki) == 2